@@ -23,21 +23,43 @@ This is a correctness-focused, compact reference implementation.
 
 Outputs
 -------
-JSON with:
-  - aLambda_msbar : dimensionless a*Λ_MSbar^{(n_f)} at μ=1/(cL)
-  - am_pi, am_p   : lattice masses for the chosen κ (or two κ's)
-  - C_pi, C_p     : ratios m/Λ (dimensionless)
-  - optional chiral extrapolation from two κ values (linear in m_pi^2).
+JSON with (every measured quantity X also has X_err, the jackknife or bootstrap
+error over binned measurements; sweep averages use the Γ-method):
+  - aLambda_msbar : dimensionless a*Λ_MSbar^{(n_f)} at μ=1/(cL) (mu_lat)
+  - g2_GF, alpha_msbar_at_mu : gradient-flow coupling and MS-bar α at μ
+  - *_c<c>        : the same three for every --c-extra value of c
+  - t0, w0, Q2_flowed : flow scales and <Q^2> at the end of the flow
+  - flow_history  : t, E, t2E, tdEdt, W, Q averaged on a common t grid
+  - am_<ch>_<i>, C_<ch>_<i> : mass and m/Λ per channel (pi, rho, p, a0, a1,
+                    b1, p_neg) at κ_i (kappa_<i>); baryons only for point sources
+  - aE_pi_<i>_p<n> : pion energies at the --momenta n
+  - am_p_chiral, C_p_chiral, am_rho_chiral, C_rho_chiral : optional chiral
+                    extrapolation from two κ values (linear in m_pi^2)
+  - plaquette, acceptance : sweep averages
+  - tau_int_plaquette, tau_int_aLambda_msbar : integrated autocorrelation times
+  - n_meas, n_bins, sweeps_done, chains : statistics (sweeps_done < the budget
+                    when --target-err stopped the run early)
+  - resumed_from  : sweep a --store run resumed at
+  - deflation_MB, deflation_residual : low-mode memory and worst relative
+                    Ritz residual (with --deflate)
 """
 
 from __future__ import annotations
 
 import argparse
+import copy
+import functools
+import hashlib
+import io
 import json
 import math
+import os
+import time
 import numpy as np
 
-from typing import Dict, Tuple, List
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import asdict, dataclass
+from typing import Any, Callable, Dict, Tuple, List
 
 # Local import (no external data): 4-loop Λ_MSbar definition
 import oph_qcd
@@ -77,28 +99,104 @@ G5 = _gamma5(GAMMA)
 PPLUS = 0.5 * (np.eye(4, dtype=np.complex128) + GAMMA[0])  # positive parity projector
 
 
+def _spin_projectors(g: List[np.ndarray]) -> List[Tuple[Tuple[np.ndarray, np.ndarray], Tuple[np.ndarray, np.ndarray]]]:
+    """Rank-2 factorisations 1 ∓ γ_μ = R P with P: 4 -> 2 and R: 2 -> 4.
+
+    (1 ∓ γ_μ)/2 is a projector, so with V the 4x2 eigenvectors of eigenvalue 2,
+    1 ∓ γ_μ = (2V)(V†). Returned per μ as ((R-, P-), (R+, P+)).
+    """
+    out = []
+    for gm in g:
+        pair = []
+        for sign in (-1.0, 1.0):
+            w, V = np.linalg.eigh(np.eye(4) + sign * gm)
+            V2 = V[:, w > 1.0]
+            pair.append((np.ascontiguousarray(2.0 * V2), np.ascontiguousarray(V2.conj().T)))
+        out.append(tuple(pair))
+    return out
+
+
+SPIN_PROJ = _spin_projectors(GAMMA)
+
+
+@functools.lru_cache(maxsize=None)
+def _spin_proj(dtype: np.dtype) -> List[Tuple[Tuple[np.ndarray, np.ndarray], Tuple[np.ndarray, np.ndarray]]]:
+    """SPIN_PROJ cast to `dtype`, so single-precision kernels stay in single precision."""
+    return [tuple((R.astype(dtype), P.astype(dtype)) for R, P in pair) for pair in SPIN_PROJ]
+
+
 # ----------------------------
 # SU(3) utilities
 # ----------------------------
 
+def _det3(X: np.ndarray) -> np.ndarray:
+    """Closed-form determinant of (..., 3, 3) matrices."""
+    return (X[..., 0, 0] * (X[..., 1, 1] * X[..., 2, 2] - X[..., 1, 2] * X[..., 2, 1])
+            - X[..., 0, 1] * (X[..., 1, 0] * X[..., 2, 2] - X[..., 1, 2] * X[..., 2, 0])
+            + X[..., 0, 2] * (X[..., 1, 0] * X[..., 2, 1] - X[..., 1, 1] * X[..., 2, 0]))
+
+
+def _eigvalsh3(H: np.ndarray) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """Closed-form (trigonometric) eigenvalues of Hermitian (..., 3, 3) matrices."""
+    q = np.trace(H, axis1=-2, axis2=-1).real / 3.0
+    A = H - q[..., None, None] * np.eye(3)
+    p = np.sqrt(np.einsum('...ab,...ab->...', A, A.conj()).real / 6.0)
+    ps = np.where(p > 0, p, 1.0)
+    r = 0.5 * _det3(A / ps[..., None, None]).real
+    phi = np.arccos(np.clip(r, -1.0, 1.0)) / 3.0
+    l1 = q + 2.0 * p * np.cos(phi)
+    l3 = q + 2.0 * p * np.cos(phi + 2.0 * math.pi / 3.0)
+    return l1, 3.0 * q - l1 - l3, l3
+
+
 def su3_project(U: np.ndarray) -> np.ndarray:
-    """Project a 3x3 complex matrix to SU(3) using polar decomposition."""
+    """Project 3x3 complex matrices (shape (..., 3, 3)) to SU(3) using polar decomposition.
+
+    Batched closed form: with H = X†X, μ_i = sqrt(eig(H)) and the symmetric
+    invariants i1, i2, i3 of R = H^(1/2), Cayley–Hamilton gives
+      R = ((i1^2 - i2) H - H^2 + i1 i3) / (i1 i2 - i3),   R^(-1) = (H - i1 R + i2) / i3,
+    which stays well conditioned for (nearly) degenerate spectra. One
+    Newton–Schulz step polishes unitarity before det^(-1/3) is applied.
+    """
+    X = np.asarray(U, dtype=np.complex128)
+    H = dagger(X) @ X
+    # μ_i >= 1e-7, i.e. the same floor as eig(X†X) >= 1e-14 in su3_project_eigh
+    m1, m2, m3 = (np.sqrt(np.maximum(l, 1e-14)) for l in _eigvalsh3(H))
+    i1 = (m1 + m2 + m3)[..., None, None]
+    i2 = (m1 * m2 + m2 * m3 + m1 * m3)[..., None, None]
+    i3 = (m1 * m2 * m3)[..., None, None]
+    I3 = np.eye(3)
+    R = ((i1 * i1 - i2) * H - H @ H + i1 * i3 * I3) / (i1 * i2 - i3)
+    Uu = X @ ((H - i1 * R + i2 * I3) / i3)
+    Uu = 0.5 * Uu @ (3.0 * I3 - dagger(Uu) @ Uu)
+    det = _det3(Uu)
+    Uu = Uu / (det ** (1.0 / 3.0))[..., None, None]
+    return Uu
+
+
+def su3_project_eigh(U: np.ndarray) -> np.ndarray:
+    """Reference polar projection to SU(3) through np.linalg.eigh (same result as su3_project)."""
     X = U
     # Polar: X = (X (X†X)^(-1/2)) * det^{-1/3}
-    H = X.conj().T @ X
+    H = dagger(X) @ X
     w, v = np.linalg.eigh(H)
     w = np.maximum(w, 1e-14)
-    Hm12 = v @ np.diag(1.0 / np.sqrt(w)) @ v.conj().T
+    Hm12 = (v / np.sqrt(w)[..., None, :]) @ dagger(v)
     Uu = X @ Hm12
     det = np.linalg.det(Uu)
-    Uu = Uu / det ** (1.0 / 3.0)
+    Uu = Uu / (det ** (1.0 / 3.0))[..., None, None]
     return Uu
 
 
-def random_su3(rng: np.random.Generator) -> np.ndarray:
-    M = (rng.normal(size=(3, 3)) + 1j * rng.normal(size=(3, 3))) / math.sqrt(2)
-    Q, _ = np.linalg.qr(M)
-    return su3_project(Q)
+def random_su3(rng: np.random.Generator, size: Tuple[int, ...] = ()) -> np.ndarray:
+    """Haar-random SU(3) matrices of shape size + (3, 3).
+
+    The polar factor of a complex Gaussian matrix is Haar distributed on U(3);
+    su3_project then removes the U(1) phase.
+    """
+    shape = tuple(size) + (3, 3)
+    M = (rng.normal(size=shape) + 1j * rng.normal(size=shape)) / math.sqrt(2)
+    return su3_project(M)
 
 
 def dagger(U: np.ndarray) -> np.ndarray:
@@ -106,6 +204,22 @@ def dagger(U: np.ndarray) -> np.ndarray:
     return np.conjugate(np.swapaxes(U, -1, -2))
 
 
+def compress_links(U: np.ndarray) -> np.ndarray:
+    """Compact (12-real) SU(3) links: the first two rows, shape (..., 2, 3)."""
+    return np.ascontiguousarray(U[..., :2, :])
+
+
+def reconstruct_links(R: np.ndarray) -> np.ndarray:
+    """SU(3) links from compress_links rows; the third row is (row 1 x row 2)*."""
+    r3 = np.conjugate(np.cross(R[..., 0, :], R[..., 1, :]))
+    return np.concatenate([R, r3[..., None, :]], axis=-2)
+
+
+def full_links(U: np.ndarray) -> np.ndarray:
+    """U itself for full (..., 3, 3) links, reconstruct_links for compact (..., 2, 3) ones."""
+    return reconstruct_links(U) if U.shape[-2] == 2 else U
+
+
 # ----------------------------
 # Lattice geometry helpers
 # ----------------------------
@@ -132,7 +246,80 @@ def plaquette_at(U: np.ndarray, x: Tuple[int, int, int, int], mu: int, nu: int,
     return U1 @ U2 @ U3 @ U4
 
 
+PLANES: List[Tuple[int, int]] = [(mu, nu) for mu in range(4) for nu in range(mu + 1, 4)]
+
+
+def plaquette_breakdown(U: np.ndarray) -> Tuple[float, np.ndarray, np.ndarray]:
+    """Whole-lattice plaquette measurement on U[T,L,L,L,4,3,3].
+
+    Uses shifted copies (np.roll along the lattice axes) and stacked 3x3 matmuls
+    instead of per-site loops. Re Tr[P_μν(x)] is evaluated as Re Tr[A B†] with
+    A = U_μ(x) U_ν(x+μ) and B = U_ν(x) U_μ(x+ν), i.e. two matmuls per plane.
+
+    Returns (average, per_plane[6], per_timeslice[T]), all normalized by 1/3 so
+    that a cold configuration gives 1. Planes are ordered as in PLANES.
+    """
+    T = U.shape[0]
+    P = np.empty((len(PLANES), T), dtype=np.float64)
+    for k, (mu, nu) in enumerate(PLANES):
+        U_mu = U[..., mu, :, :]
+        U_nu = U[..., nu, :, :]
+        A = U_mu @ np.roll(U_nu, -1, axis=mu)
+        B = U_nu @ np.roll(U_mu, -1, axis=nu)
+        tr = np.einsum('...ab,...ab->...', A, B.conj()).real
+        P[k] = tr.reshape(T, -1).mean(axis=1) / 3.0
+    return float(P.mean()), P.mean(axis=1), P.mean(axis=0)
+
+
 def measure_plaquette(U: np.ndarray, L: int, T: int) -> float:
+    """Average plaquette (1/3) Re Tr P over all sites and planes."""
+    return plaquette_breakdown(U)[0]
+
+
+def clover_field(U: np.ndarray) -> np.ndarray:
+    """Clover field strength G_μν(x) = TA[Q_μν(x)]/4 for all sites, shape [6,T,L,L,L,3,3].
+
+    Q_μν is the sum of the four plaquette leaves around x in the μν plane and
+    TA the traceless anti-Hermitian part, so that G ≈ a^2 F_μν. Planes are
+    ordered as in PLANES.
+    """
+    def sh(A: np.ndarray, mu: int, s: int) -> np.ndarray:
+        # A(x + s μ̂)
+        return np.roll(A, -s, axis=mu)
+
+    G = np.empty((len(PLANES),) + U.shape[:4] + (3, 3), dtype=U.dtype)
+    for k, (mu, nu) in enumerate(PLANES):
+        U_mu = U[..., mu, :, :]
+        U_nu = U[..., nu, :, :]
+        U_mu_m = sh(U_mu, mu, -1)           # U_μ(x-μ)
+        U_nu_m = sh(U_nu, nu, -1)           # U_ν(x-ν)
+        Q = U_mu @ sh(U_nu, mu, 1) @ dagger(sh(U_mu, nu, 1)) @ dagger(U_nu)
+        Q += U_nu @ dagger(sh(U_mu_m, nu, 1)) @ dagger(sh(U_nu, mu, -1)) @ U_mu_m
+        Q += dagger(U_mu_m) @ dagger(sh(U_nu_m, mu, -1)) @ sh(U_mu_m, nu, -1) @ U_nu_m
+        Q += dagger(U_nu_m) @ sh(U_mu, nu, -1) @ sh(U_nu_m, mu, 1) @ dagger(U_mu)
+        G[k] = 0.25 * traceless_antiherm(Q)
+    return G
+
+
+def clover_energy_density(U: np.ndarray) -> Tuple[float, float]:
+    """Clover E = -Σ_{μ<ν} Tr[G_μν G_μν] (site average) and topological charge Q.
+
+    q(x) = -1/(32π^2) ε_μνρσ Tr[G_μν G_ρσ]
+         = -1/(4π^2) (Tr[G01 G23] - Tr[G02 G13] + Tr[G03 G12]).
+    """
+    G = clover_field(U)
+
+    def tr(a: np.ndarray, b: np.ndarray) -> np.ndarray:
+        return np.einsum('...ab,...ba->...', a, b).real
+
+    E = -sum(tr(G[k], G[k]) for k in range(len(PLANES)))
+    # PLANES order: 01, 02, 03, 12, 13, 23
+    q = -(tr(G[0], G[5]) - tr(G[1], G[4]) + tr(G[2], G[3])) / (4.0 * math.pi ** 2)
+    return float(E.mean()), float(q.sum())
+
+
+def measure_plaquette_scalar(U: np.ndarray, L: int, T: int) -> float:
+    """Site-by-site reference implementation of measure_plaquette (slow)."""
     tot = 0.0
     cnt = 0
     for t in range(T):
@@ -176,41 +363,404 @@ def staple(U: np.ndarray, x: Tuple[int, int, int, int], mu: int, L: int, T: int)
     return S
 
 
-def sweep_metropolis(U: np.ndarray, beta: float, rng: np.random.Generator, L: int, T: int, step: float = 0.24) -> None:
+def sweep_metropolis(U: np.ndarray, beta: float, rng: np.random.Generator, L: int, T: int, step: float = 0.24) -> float:
+    """One site-by-site Metropolis sweep (reference implementation).
+
+    The local action of U_μ(x) is -β/3 Re Tr[U_μ(x) S_μ(x)†], with S the staple
+    sum from staple(). Returns the acceptance rate of the sweep.
+    """
+    n_acc = 0
     for t in range(T):
         for x1 in range(L):
             for x2 in range(L):
                 for x3 in range(L):
                     x = (t, x1, x2, x3)
                     for mu in range(4):
-                        S = staple(U, x, mu, L, T)
+                        W = dagger(staple(U, x, mu, L, T))
                         U_old = U[t, x1, x2, x3, mu]
                         R = np.eye(3, dtype=np.complex128) + step * (rng.normal(size=(3, 3)) + 1j * rng.normal(size=(3, 3)))
                         U_new = su3_project(R @ U_old)
                         dS = -beta / 3.0 * (
-                            np.real(np.trace(U_new @ S)) - np.real(np.trace(U_old @ S))
+                            np.real(np.trace(U_new @ W)) - np.real(np.trace(U_old @ W))
                         )
                         if dS < 0 or rng.random() < math.exp(-dS):
                             U[t, x1, x2, x3, mu] = U_new
+                            n_acc += 1
+    return n_acc / (4.0 * T * L ** 3)
+
+
+def parity_mask(L: int, T: int) -> np.ndarray:
+    """Boolean [T,L,L,L] mask of even sites, (t+x+y+z) % 2 == 0."""
+    if L % 2 or T % 2:
+        raise ValueError("checkerboard decomposition needs even L and T")
+    t, x1, x2, x3 = np.indices((T, L, L, L))
+    return (t + x1 + x2 + x3) % 2 == 0
+
+
+@functools.lru_cache(maxsize=None)
+def neighbour_tables(L: int, T: int) -> Tuple[np.ndarray, np.ndarray]:
+    """Flat-site neighbour tables (fwd, bwd), each [4, V] with V=T*L^3.
+
+    fwd[μ, i] / bwd[μ, i] is the flat index (C order over [T,L,L,L]) of site i
+    shifted by ±μ, i.e. the index-table version of shift(). Cached per (L,T).
+    """
+    idx = np.arange(T * L ** 3).reshape(T, L, L, L)
+    fwd = np.stack([np.roll(idx, -1, axis=mu).ravel() for mu in range(4)])
+    bwd = np.stack([np.roll(idx, +1, axis=mu).ravel() for mu in range(4)])
+    fwd.flags.writeable = False
+    bwd.flags.writeable = False
+    return fwd, bwd
+
+
+@functools.lru_cache(maxsize=None)
+def sublattices(L: int, T: int) -> Tuple[np.ndarray, np.ndarray]:
+    """Flat indices of the (even, odd) sublattices. Cached per (L,T)."""
+    even = parity_mask(L, T).ravel()
+    sites = (np.flatnonzero(even), np.flatnonzero(~even))
+    for s in sites:
+        s.flags.writeable = False
+    return sites
+
+
+def links_flat(U: np.ndarray) -> np.ndarray:
+    """View of U[T,L,L,L,4,3,3] as [V,4,3,3] for in-place updates (no copy)."""
+    if not U.flags.c_contiguous:
+        raise ValueError("gauge field must be C-contiguous for in-place updates")
+    return U.reshape(-1, 4, 3, 3)
+
+
+def staple_field(U: np.ndarray, mu: int, sites: np.ndarray | None = None,
+                 dirs: Tuple[int, ...] = (0, 1, 2, 3)) -> np.ndarray:
+    """Staple sum S_μ(x) of staple() for many sites at once.
+
+    Without sites the full field [T,L,L,L,3,3] is returned; with an array of
+    flat site indices (e.g. one of sublattices()) only those rows, [n,3,3].
+    Neighbours are gathered through the cached neighbour_tables(). dirs
+    restricts the staple directions ν (e.g. spatial staples for smearing).
+    """
+    T, L = U.shape[0], U.shape[1]
+    fwd, bwd = neighbour_tables(L, T)
+    Uf = links_flat(U)
+    s = np.arange(Uf.shape[0]) if sites is None else sites
+    x_mu = fwd[mu, s]
+    S = np.zeros((len(s), 3, 3), dtype=U.dtype)
+    for nu in dirs:
+        if nu == mu:
+            continue
+        # forward: U_ν(x) U_μ(x+ν) U_ν(x+μ)†
+        S += Uf[s, nu] @ Uf[fwd[nu, s], mu] @ dagger(Uf[x_mu, nu])
+        # backward: U_ν(x-ν)† U_μ(x-ν) U_ν(x-ν+μ)
+        x_mnu = bwd[nu, s]
+        S += dagger(Uf[x_mnu, nu]) @ Uf[x_mnu, mu] @ Uf[fwd[mu, x_mnu], nu]
+    if sites is None:
+        return S.reshape(U.shape[:4] + (3, 3))
+    return S
+
+
+def sweep_checkerboard(U: np.ndarray, beta: float, rng: np.random.Generator, L: int, T: int,
+                       step: float = 0.24) -> float:
+    """Metropolis sweep over even/odd sublattices, one direction μ at a time.
+
+    Links U_μ(x) on one parity do not appear in each other's staples, so all of
+    them are proposed, accepted or rejected simultaneously with the same
+    Metropolis rule as sweep_metropolis. Returns the acceptance rate.
+    """
+    Uf = links_flat(U)
+    n_acc = 0
+    for mu in range(4):
+        for sites in sublattices(L, T):
+            W = dagger(staple_field(U, mu, sites))
+            U_old = Uf[sites, mu]
+            n = U_old.shape[0]
+            R = np.eye(3, dtype=np.complex128) + step * (rng.normal(size=(n, 3, 3)) + 1j * rng.normal(size=(n, 3, 3)))
+            U_new = su3_project(R @ U_old)
+            dS = -beta / 3.0 * (
+                np.einsum('nab,nba->n', U_new, W).real - np.einsum('nab,nba->n', U_old, W).real
+            )
+            acc = rng.random(n) < np.exp(-np.maximum(dS, 0.0))
+            Uf[sites[acc], mu] = U_new[acc]
+            n_acc += int(acc.sum())
+    return n_acc / (4.0 * T * L ** 3)
+
+
+SU2_SUBGROUPS: List[Tuple[int, int]] = [(0, 1), (1, 2), (0, 2)]
+
+
+def _su2_block(M: np.ndarray, i: int, j: int) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """Project the (i,j) 2x2 block of M onto k * V, V in SU(2).
+
+    A 2x2 block is split into [[a, b], [-b*, a*]] (real span of SU(2)) plus a
+    remainder that is orthogonal to SU(2) under Re Tr. Returns (a, b, k).
+    """
+    a = 0.5 * (M[..., i, i] + np.conj(M[..., j, j]))
+    b = 0.5 * (M[..., i, j] - np.conj(M[..., j, i]))
+    k = np.sqrt(np.abs(a) ** 2 + np.abs(b) ** 2)
+    return a, b, k
+
+
+def _su2_left_multiply(U: np.ndarray, i: int, j: int, r00: np.ndarray, r01: np.ndarray) -> None:
+    """In place U <- R U for R = [[r00, r01], [-r01*, r00*]] embedded in rows (i,j)."""
+    Ui = U[..., i, :].copy()
+    Uj = U[..., j, :]
+    U[..., i, :] = r00[..., None] * Ui + r01[..., None] * Uj
+    U[..., j, :] = -np.conj(r01)[..., None] * Ui + np.conj(r00)[..., None] * Uj
+
+
+def _kennedy_pendleton(alpha: np.ndarray, rng: np.random.Generator) -> np.ndarray:
+    """Sample x0 in [-1,1] with density ∝ sqrt(1-x0^2) exp(alpha x0) (Kennedy & Pendleton 1985)."""
+    x0 = np.empty_like(alpha)
+    todo = np.arange(alpha.size)
+    while todo.size:
+        a = alpha[todo]
+        r1 = 1.0 - rng.random(todo.size)
+        r2 = rng.random(todo.size)
+        r3 = 1.0 - rng.random(todo.size)
+        lam2 = -(np.log(r1) + np.cos(2.0 * math.pi * r2) ** 2 * np.log(r3)) / (2.0 * a)
+        ok = rng.random(todo.size) ** 2 <= 1.0 - lam2
+        x0[todo[ok]] = 1.0 - 2.0 * lam2[ok]
+        todo = todo[~ok]
+    return x0
+
+
+def _random_su2(x0: np.ndarray, rng: np.random.Generator) -> Tuple[np.ndarray, np.ndarray]:
+    """SU(2) elements (r00, r01) with fixed x0 and uniformly distributed x⃗."""
+    n = x0.size
+    r = np.sqrt(np.maximum(0.0, 1.0 - x0 * x0))
+    cos_th = 2.0 * rng.random(n) - 1.0
+    sin_th = np.sqrt(1.0 - cos_th * cos_th)
+    phi = 2.0 * math.pi * rng.random(n)
+    x1 = r * sin_th * np.cos(phi)
+    x2 = r * sin_th * np.sin(phi)
+    x3 = r * cos_th
+    return x0 + 1j * x3, x2 + 1j * x1
+
+
+def _cm_update(U_sub: np.ndarray, W: np.ndarray, beta: float, rng: np.random.Generator | None) -> None:
+    """Cabibbo–Marinari pass over the three SU(2) subgroups, in place on U_sub[n,3,3].
+
+    With rng: heat-bath for exp(β/3 Re Tr[U W]); without: overrelaxation, which
+    reflects each subgroup element and leaves the local action unchanged.
+    """
+    for i, j in SU2_SUBGROUPS:
+        a, b, k = _su2_block(U_sub @ W, i, j)
+        k = np.maximum(k, 1e-14)
+        # V† for V = [[a, b], [-b*, a*]] / k
+        v00 = np.conj(a) / k
+        v01 = -b / k
+        if rng is None:
+            # R = (V†)^2
+            r00 = v00 * v00 - v01 * np.conj(v01)
+            r01 = v00 * v01 + v01 * np.conj(v00)
+        else:
+            x00, x01 = _random_su2(_kennedy_pendleton(2.0 * beta * k / 3.0, rng), rng)
+            # R = X V†
+            r00 = x00 * v00 - x01 * np.conj(v01)
+            r01 = x00 * v01 + x01 * np.conj(v00)
+        _su2_left_multiply(U_sub, i, j, r00, r01)
+
+
+def sweep_heatbath(U: np.ndarray, beta: float, rng: np.random.Generator, L: int, T: int,
+                   n_or: int = 4) -> float:
+    """Cabibbo–Marinari SU(2)-subgroup heat-bath sweep followed by n_or overrelaxation sweeps.
+
+    Runs over the same even/odd sublattices as sweep_checkerboard. The heat-bath
+    always accepts, so the returned acceptance rate is 1.
+    """
+    Uf = links_flat(U)
+    for hit in range(1 + n_or):
+        for mu in range(4):
+            for sites in sublattices(L, T):
+                W = dagger(staple_field(U, mu, sites))
+                U_sub = Uf[sites, mu]
+                _cm_update(U_sub, W, beta, rng if hit == 0 else None)
+                Uf[sites, mu] = U_sub
+    # remove accumulated rounding drift
+    U[...] = su3_project(U)
+    return 1.0
+
+
+UPDATES = {
+    "checkerboard": sweep_checkerboard,
+    "heatbath": sweep_heatbath,
+    "scalar": sweep_metropolis,
+}
+# updates that sweep the even/odd sublattices, and so need even L and T
+SUBLATTICE_UPDATES = ("checkerboard", "heatbath")
 
 
 # ----------------------------
 # Gradient flow + GF coupling
 # ----------------------------
 
+def su3_expm(A: np.ndarray) -> np.ndarray:
+    """exp(A) for anti-Hermitian (..., 3, 3) matrices via the eigenbasis of the Hermitian iA."""
+    w, v = np.linalg.eigh(1j * A)
+    return (v * np.exp(-1j * w)[..., None, :]) @ dagger(v)
+
+
+def traceless_antiherm(M: np.ndarray) -> np.ndarray:
+    """Traceless anti-Hermitian part (M - M†)/2 - Tr(M - M†)/6 of (..., 3, 3) matrices."""
+    A = 0.5 * (M - dagger(M))
+    tr = np.trace(A, axis1=-2, axis2=-1) / 3.0
+    return A - tr[..., None, None] * np.eye(3)
+
+
+def flow_force(U: np.ndarray) -> np.ndarray:
+    """Wilson-flow generator Z_μ(x) = -TA[U_μ(x) S_μ(x)†] for all links, shape of U.
+
+    With β=6/g0^2 this is -g0^2 ∂_{x,μ} S_W of the Wilson action (Lüscher 2010).
+    """
+    Z = np.empty_like(U)
+    for mu in range(4):
+        Z[..., mu, :, :] = -traceless_antiherm(U[..., mu, :, :] @ dagger(staple_field(U, mu)))
+    return Z
+
+
 def flow_step(U: np.ndarray, eps: float, L: int, T: int) -> np.ndarray:
-    """A crude Wilson flow step: U <- Proj( exp(-eps * staple_antiherm) U )."""
-    out = U.copy()
-    for t in range(T):
-        for x1 in range(L):
-            for x2 in range(L):
-                for x3 in range(L):
-                    x = (t, x1, x2, x3)
-                    for mu in range(4):
-                        S = staple(out, x, mu, L, T)
-                        A = 0.5 * (S - dagger(S))
-                        out[t, x1, x2, x3, mu] = su3_project((np.eye(3) - eps * A) @ out[t, x1, x2, x3, mu])
-    return out
+    """One Wilson-flow step of size eps with Lüscher's 3rd-order Runge–Kutta scheme.
+
+      W1 = exp(Z0/4) W0
+      W2 = exp(8/9 Z1 - 17/36 Z0) W1
+      W3 = exp(3/4 Z2 - 8/9 Z1 + 17/36 Z0) W2,   Z_i = eps Z(W_i)
+
+    All links are advanced together (no partially flowed neighbours). The input
+    field is not modified.
+    """
+    return _flow_rk3(U, eps)[0]
+
+
+def _flow_rk3(U: np.ndarray, eps: float) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """RK3 flow step; returns (W3, Z0, Z1) so callers can form the embedded estimate."""
+    Z0 = eps * flow_force(U)
+    W = su3_expm(0.25 * Z0) @ U
+    Z1 = eps * flow_force(W)
+    W = su3_expm((8.0 / 9.0) * Z1 - (17.0 / 36.0) * Z0) @ W
+    Z2 = eps * flow_force(W)
+    return su3_expm(0.75 * Z2 - (8.0 / 9.0) * Z1 + (17.0 / 36.0) * Z0) @ W, Z0, Z1
+
+
+def flow_step_adaptive(U: np.ndarray, eps: float) -> Tuple[np.ndarray, float]:
+    """RK3 flow step plus an embedded error estimate (Fritzsch & Ramos 2013).
+
+    The 2nd-order companion exp(2 Z1 - Z0) W0 reuses the RK3 stages; the
+    estimate is max |W3 - W̃| over all link matrix elements.
+    """
+    W3, Z0, Z1 = _flow_rk3(U, eps)
+    W_low = su3_expm(2.0 * Z1 - Z0) @ U
+    return W3, float(np.abs(W3 - W_low).max())
+
+
+def flow_energy(U: np.ndarray) -> float:
+    """Plaquette energy density E = 12 N (1 - <P>) in lattice units (N=3)."""
+    return 12.0 * 3.0 * max(0.0, 1.0 - plaquette_breakdown(U)[0])
+
+
+def flow_trajectory(U: np.ndarray, L: int, T: int, t_list: List[float], eps: float = 0.01,
+                    tol: float | None = None, max_growth: float = 2.0,
+                    observer: Callable[[float, np.ndarray], None] | None = None) -> Dict[str, np.ndarray]:
+    """Flow U once and measure E(t), t^2 E(t) at every requested flow time.
+
+    Fixed-step mode (tol=None): each interval between requested times is split
+    into round(Δt/eps) equal RK3 steps.
+    Adaptive mode: eps is the initial step; steps with embedded error above tol
+    are rejected, and the step size follows 0.95 (tol/err)^(1/3), growing by at
+    most max_growth per step. Steps are clipped to land on requested times.
+
+    observer(t, V), if given, is called at t=0 and after every accepted step
+    (see FlowHistory). U may be compact (compress_links).
+
+    Returns arrays 't', 'E', 't2E' (sorted by t) and the step counts
+    'n_steps', 'n_rejected'.
+    """
+    ts = sorted(set(float(t) for t in t_list))
+    if not ts or ts[0] < 0:
+        raise ValueError("flow times must be non-negative")
+
+    V = full_links(U)
+    t = 0.0
+    h = eps
+    n_steps = 0
+    n_rej = 0
+    E = np.empty(len(ts))
+    if observer is not None:
+        observer(0.0, V)
+    for i, target in enumerate(ts):
+        if tol is None:
+            n = max(1, int(round((target - t) / eps))) if target > t else 0
+            h_seg = (target - t) / n if n else 0.0
+            for k in range(n):
+                V = flow_step(V, h_seg, L, T)
+                if observer is not None:
+                    observer(t + (k + 1) * h_seg, V)
+            n_steps += n
+            t = target
+        else:
+            while t < target - 1e-12 * max(1.0, target):
+                h_try = min(h, target - t)
+                W, err = flow_step_adaptive(V, h_try)
+                fac = 0.95 * (tol / max(err, 1e-300)) ** (1.0 / 3.0)
+                if err <= tol:
+                    V = W
+                    t += h_try
+                    n_steps += 1
+                    if observer is not None:
+                        observer(t, V)
+                    h = max(h, h_try * min(fac, max_growth)) if h_try < h else h_try * min(fac, max_growth)
+                else:
+                    h = h_try * max(fac, 0.1)
+                    n_rej += 1
+            t = target
+        E[i] = flow_energy(V)
+    t_arr = np.array(ts)
+    return {"t": t_arr, "E": E, "t2E": t_arr ** 2 * E,
+            "n_steps": np.array(n_steps), "n_rejected": np.array(n_rej)}
+
+
+class FlowHistory:
+    """Flow observer recording clover E(t), t^2 E(t) and Q(t) at every flow step.
+
+    Pass an instance as flow_trajectory(..., observer=...). t dE/dt and
+    W(t) = t d/dt[t^2 E] follow from the recorded points (no extra flow).
+    """
+
+    def __init__(self) -> None:
+        self.t: List[float] = []
+        self.E: List[float] = []
+        self.Q: List[float] = []
+
+    def __call__(self, t: float, V: np.ndarray) -> None:
+        E, Q = clover_energy_density(V)
+        self.t.append(float(t))
+        self.E.append(E)
+        self.Q.append(Q)
+
+    def as_arrays(self) -> Dict[str, np.ndarray]:
+        t = np.array(self.t)
+        E = np.array(self.E)
+        t2E = t ** 2 * E
+        if len(t) > 1:
+            tdEdt = t * np.gradient(E, t)
+            W = t * np.gradient(t2E, t)
+        else:
+            tdEdt = np.full_like(t, np.nan)
+            W = np.full_like(t, np.nan)
+        return {"t": t, "E": E, "t2E": t2E, "tdEdt": tdEdt, "W": W, "Q": np.array(self.Q)}
+
+
+def flow_scales(t: np.ndarray, t2E: np.ndarray, W: np.ndarray, ref: float = 0.3) -> Tuple[float, float]:
+    """(t0, w0) in lattice units from t^2 E(t0)=ref and W(w0^2)=ref; NaN if not reached."""
+    def crossing(y: np.ndarray) -> float:
+        ok = np.isfinite(y)
+        tt, yy = t[ok], y[ok]
+        above = np.flatnonzero(yy >= ref)
+        if len(above) == 0 or above[0] == 0:
+            return float('nan')
+        i = above[0]
+        return float(tt[i - 1] + (ref - yy[i - 1]) * (tt[i] - tt[i - 1]) / (yy[i] - yy[i - 1]))
+
+    t0 = crossing(t2E)
+    w0_sq = crossing(W)
+    return t0, float(math.sqrt(w0_sq)) if math.isfinite(w0_sq) else float('nan')
 
 
 def theta3(q: float, n_terms: int = 50) -> float:
@@ -266,24 +816,8 @@ def alpha_msbar_from_g2(g2_gf: float, n_f: int) -> float:
     return float(a)
 
 
-def gf_coupling_msbar_aLambda(U: np.ndarray, L: int, T: int, c: float, n_f: int,
-                             eps_flow: float = 0.01, n_steps: int | None = None) -> Tuple[float, float, float]:
-    """Return (g2_GF, α_MSbar(μ), aΛ_MSbar) from flowed plaquette at t=(cL)^2/8."""
-    t_target = (c * L) ** 2 / 8.0
-    if n_steps is None:
-        n_steps = max(1, int(round(t_target / eps_flow)))
-    eps = t_target / n_steps
-
-    Uf = U
-    for _ in range(n_steps):
-        Uf = flow_step(Uf, eps, L, T)
-
-    pl = measure_plaquette(Uf, L, T)
-
-    # E ≈ 12*N*(1 - <P>) in lattice units (a=1). Here N=3.
-    E_lat = 12.0 * 3.0 * max(0.0, (1.0 - pl))
-    t2E = (t_target ** 2) * E_lat
-
+def gf_msbar_from_t2E(t2E: float, c: float, L: int, n_f: int) -> Tuple[float, float, float]:
+    """(g2_GF, α_MSbar(μ), aΛ_MSbar) from t^2 E(t) measured at t=(cL)^2/8."""
     # g_GF^2 definition with δ(c) correction at tree level.
     N = 3
     norm = (128.0 * math.pi ** 2) / (3.0 * (N * N - 1.0))
@@ -297,28 +831,701 @@ def gf_coupling_msbar_aLambda(U: np.ndarray, L: int, T: int, c: float, n_f: int,
     return float(g2), float(alpha), float(aLambda)
 
 
+def gf_couplings_msbar_aLambda(U: np.ndarray, L: int, T: int, cs: List[float], n_f: int,
+                               eps_flow: float = 0.01, tol_flow: float | None = None,
+                               observer: Callable[[float, np.ndarray], None] | None = None
+                               ) -> List[Tuple[float, float, float]]:
+    """gf_coupling_msbar_aLambda for several c values from a single flow trajectory."""
+    traj = flow_trajectory(U, L, T, [(c * L) ** 2 / 8.0 for c in cs], eps=eps_flow, tol=tol_flow,
+                           observer=observer)
+    t2E = dict(zip(traj["t"].tolist(), traj["t2E"].tolist()))
+    return [gf_msbar_from_t2E(t2E[(c * L) ** 2 / 8.0], c, L, n_f) for c in cs]
+
+
+def gf_coupling_msbar_aLambda(U: np.ndarray, L: int, T: int, c: float, n_f: int,
+                             eps_flow: float = 0.01, n_steps: int | None = None,
+                             tol_flow: float | None = None) -> Tuple[float, float, float]:
+    """Return (g2_GF, α_MSbar(μ), aΛ_MSbar) from flowed plaquette at t=(cL)^2/8."""
+    t_target = (c * L) ** 2 / 8.0
+    if n_steps is not None:
+        eps_flow = t_target / n_steps
+    # E ≈ 12*N*(1 - <P>) in lattice units (a=1), see flow_energy().
+    traj = flow_trajectory(U, L, T, [t_target], eps=eps_flow, tol=tol_flow)
+    return gf_msbar_from_t2E(float(traj["t2E"][0]), c, L, n_f)
+
+
+# ----------------------------
+# Link and quark smearing
+# ----------------------------
+
+SPATIAL = (1, 2, 3)
+
+
+def ape_smear(U: np.ndarray, alpha: float = 0.5, n_steps: int = 10,
+              dirs: Tuple[int, ...] = SPATIAL) -> np.ndarray:
+    """APE-smeared copy of U: U_μ <- P[(1-α) U_μ + α/(2(d-1)) Σ_ν staples], μ,ν in dirs.
+
+    P is su3_project; the default smears spatial links with spatial staples
+    only (α/4), as used for quark smearing. Links outside dirs are untouched.
+    """
+    V = U.copy()
+    for _ in range(n_steps):
+        W = V.copy()
+        for mu in dirs:
+            others = tuple(nu for nu in dirs if nu != mu)
+            W[..., mu, :, :] = su3_project((1.0 - alpha) * V[..., mu, :, :]
+                                           + alpha / (2 * len(others)) * staple_field(V, mu, dirs=others))
+        V = W
+    return V
+
+
+def stout_smear(U: np.ndarray, rho: float = 0.1, n_steps: int = 10,
+                dirs: Tuple[int, ...] = SPATIAL) -> np.ndarray:
+    """Stout-smeared copy of U: U_μ <- exp(ρ Z_μ) U_μ, Z_μ = -TA[U_μ S_μ†] (Morningstar-Peardon).
+
+    Staples run over dirs only; with all four directions one step is an Euler
+    step of the Wilson flow (flow_force). Stays in SU(3) without projection.
+    """
+    V = U.copy()
+    for _ in range(n_steps):
+        W = V.copy()
+        for mu in dirs:
+            others = tuple(nu for nu in dirs if nu != mu)
+            Vm = V[..., mu, :, :]
+            W[..., mu, :, :] = su3_expm(-rho * traceless_antiherm(Vm @ dagger(staple_field(V, mu, dirs=others)))) @ Vm
+        V = W
+    return V
+
+
+LINK_SMEARINGS = {"ape": ape_smear, "stout": stout_smear}
+
+
+class QuarkSmearing:
+    """Wuppertal (Gaussian) quark smearing for one gauge configuration.
+
+    psi <- (psi + κ_s H_s psi) / (1 + 6 κ_s), applied n_steps times, with H_s
+    the spatial, spin-diagonal colour hopping term on smeared links (APE or
+    stout, see LINK_SMEARINGS; "none" uses U). The width grows like
+    sqrt(n_steps κ_s); timeslices are never mixed. Smeared links are built once
+    here and reused for every source, sink and κ.
+    """
+
+    def __init__(self, U: np.ndarray, kappa_s: float = 0.25, n_steps: int = 20,
+                 links: str = "ape", link_steps: int = 10, **link_kw: float):
+        if links != "none" and links not in LINK_SMEARINGS:
+            raise ValueError(f"unknown link smearing: {links}")
+        V = U if links == "none" else LINK_SMEARINGS[links](U, n_steps=link_steps, **link_kw)
+        self.kappa_s = float(kappa_s)
+        self.n_steps = int(n_steps)
+        self._U = [V[..., k, None, :, :] for k in SPATIAL]          # broadcast over spin
+        self._Ud = [dagger(u) for u in self._U]
+
+    def apply(self, psi: np.ndarray) -> np.ndarray:
+        """Smear a spinor field [T,L,L,L,4,3] or block [T,L,L,L,4,3,n] at every site."""
+        multi = psi.ndim == 7
+        psi = psi if multi else psi[..., None]
+        norm = 1.0 / (1.0 + 6.0 * self.kappa_s)
+        for _ in range(self.n_steps):
+            h = np.zeros_like(psi)
+            for k, Uk, Ukd in zip(SPATIAL, self._U, self._Ud):
+                h += Uk @ np.roll(psi, -1, axis=k)
+                h += np.roll(Ukd @ psi, +1, axis=k)
+            psi = norm * (psi + self.kappa_s * h)
+        return psi if multi else psi[..., 0]
+
+    def sink(self, S: np.ndarray) -> np.ndarray:
+        """Smear the sink of a propagator S[t,x,y,z, s, s0, c, c0] (see prop_from_point).
+
+        Also takes the colour-diluted arrays of props_from_stochastic."""
+        T, L, nc = S.shape[0], S.shape[1], S.shape[-1]   # nc < 3 for props_from_stochastic
+        psi = np.transpose(S, (0, 1, 2, 3, 4, 6, 5, 7)).reshape(T, L, L, L, 4, 3, 4 * nc)
+        return np.ascontiguousarray(np.transpose(self.apply(psi).reshape(T, L, L, L, 4, 3, 4, nc),
+                                                 (0, 1, 2, 3, 4, 6, 5, 7)))
+
+
+
 # ----------------------------
 # Wilson Dirac operator + CG
 # ----------------------------
 
-def apply_D(U: np.ndarray, psi: np.ndarray, kappa: float, L: int, T: int) -> np.ndarray:
-    """Wilson Dirac operator (r=1, m0 absorbed into κ)."""
-    out = psi.copy()
+def apply_hop(U: np.ndarray, psi: np.ndarray) -> np.ndarray:
+    """Wilson hopping term H psi, so that D = 1 - κ H.
+
+    psi is a spinor field [T,L,L,L,4,3] or a block of n of them, [T,L,L,L,4,3,n].
+    Each direction projects to half spinors with SPIN_PROJ, so the colour
+    multiply and the shift act on 2 spin components instead of 4. Works in the
+    precision of psi (complex64 or complex128). U may be compact
+    (compress_links); links are then rebuilt one direction at a time.
+    """
+    multi = psi.ndim == 7
+    psi = psi if multi else psi[..., None]
+    spins = psi.shape[:4] + (4, -1)         # spin x (colour*n) for the projectors
+    halves = psi.shape[:4] + (2, 3, -1)
+    out = np.zeros_like(psi)
+    proj = _spin_proj(psi.dtype)
     for mu in range(4):
-        g = GAMMA[mu]
-        # forward hop
-        psi_f = np.roll(psi, -1, axis=mu)  # axis 0 is time
-        # multiply by link U_mu(x)
-        U_mu = U[..., mu, :, :]
-        tmp_f = np.einsum('...ab,...sb->...sa', U_mu, psi_f)
-        out -= kappa * np.einsum('ij,...ja->...ia', (np.eye(4) - g), tmp_f)
-
-        # backward hop
-        psi_b = np.roll(psi, +1, axis=mu)
-        U_b = np.roll(U_mu, +1, axis=mu)
-        tmp_b = np.einsum('...ab,...sb->...sa', dagger(U_b), psi_b)
-        out -= kappa * np.einsum('ij,...ja->...ia', (np.eye(4) + g), tmp_b)
-    return out
+        (Rm, Pm), (Rp, Pp) = proj[mu]
+        U_mu = full_links(U[..., mu, None, :, :])
+        # forward hop: (1 - γ_μ) U_μ(x) psi(x+μ); axis 0 is time
+        h = np.roll((Pm @ psi.reshape(spins)).reshape(halves), -1, axis=mu)
+        h = U_mu @ h
+        out += (Rm @ h.reshape(halves[:4] + (2, -1))).reshape(psi.shape)
+
+        # backward hop: (1 + γ_μ) U_μ(x-μ)† psi(x-μ), multiplied at x-μ then shifted
+        h = dagger(U_mu) @ (Pp @ psi.reshape(spins)).reshape(halves)
+        h = np.roll(h, +1, axis=mu)
+        out += (Rp @ h.reshape(halves[:4] + (2, -1))).reshape(psi.shape)
+    return out if multi else out[..., 0]
+
+
+def apply_D(U: np.ndarray, psi: np.ndarray, kappa: float, L: int, T: int) -> np.ndarray:
+    """Wilson Dirac operator (r=1, m0 absorbed into κ): D psi = psi - κ H psi."""
+    return psi - kappa * apply_hop(U, psi)
+
+
+def _colnorm2(x: np.ndarray) -> np.ndarray:
+    """Squared 2-norm of every column (last axis) of a spinor block."""
+    return np.sum(x.real ** 2 + x.imag ** 2, axis=tuple(range(x.ndim - 1)))
+
+
+def _g5_block(x: np.ndarray) -> np.ndarray:
+    """γ5 on the spin index of a spinor block [..., 4, 3, n]."""
+    return np.einsum('ij,...jan->...ian', G5.astype(x.dtype, copy=False), x)
+
+
+class EvenOddWilson:
+    """Hopping term of one gauge field split into even/odd checkerboard blocks.
+
+    Half fields are site-major blocks [V/2,4,3,n] over sublattices(L,T). The
+    links and neighbour indices each parity needs are gathered once here, so
+    a solve does no rolls and no full-lattice work per iteration. With
+    dtype=np.complex64 the gathered links (and so hop) are single precision.
+    compact=True (the default for compact U) keeps the gathered links as two
+    rows (compress_links), a third less link memory, and rebuilds them per
+    direction in hop. single() is the complex64 copy for mixed precision,
+    built once per operator.
+    """
+
+    def __init__(self, U: np.ndarray, dtype: Any = np.complex128, compact: bool | None = None):
+        self.compact = U.shape[-2] == 2 if compact is None else compact
+        U = np.ascontiguousarray(full_links(U))
+        T, L = U.shape[0], U.shape[1]
+        if L % 2 or T % 2:
+            raise ValueError(f"even-odd preconditioning needs even L and T (got L={L}, T={T})")
+        fwd, bwd = neighbour_tables(L, T)
+        self.sites = sublattices(L, T)
+        self.shape = (T, L, L, L)
+        pos = np.empty(fwd.shape[1], dtype=np.intp)
+        for sub in self.sites:
+            pos[sub] = np.arange(sub.size)
+        links = links_flat(U)
+        self._gather = []
+        for sub in self.sites:
+            U_f = np.stack([links[sub, mu] for mu in range(4)]).astype(dtype)
+            U_b = np.stack([dagger(links[bwd[mu, sub], mu]) for mu in range(4)]).astype(dtype)
+            if self.compact:
+                U_f, U_b = compress_links(U_f), compress_links(U_b)
+            self._gather.append((U_f, U_b, pos[fwd[:, sub]], pos[bwd[:, sub]]))
+        self.dtype = np.dtype(dtype)
+        self.nbytes = sum(g[0].nbytes + g[1].nbytes for g in self._gather)   # gathered links
+        self._single: EvenOddWilson | None = self if self.dtype == np.complex64 else None
+
+    def single(self) -> EvenOddWilson:
+        """This operator with complex64 links (cached)."""
+        if self._single is None:
+            lo = copy.copy(self)
+            lo._gather = [(U_f.astype(np.complex64), U_b.astype(np.complex64), n_f, n_b)
+                          for U_f, U_b, n_f, n_b in self._gather]
+            lo.dtype = np.dtype(np.complex64)
+            lo.nbytes = sum(g[0].nbytes + g[1].nbytes for g in lo._gather)
+            lo._single = lo
+            self._single = lo
+        return self._single
+
+    def hop(self, psi: np.ndarray, parity: int) -> np.ndarray:
+        """H restricted to sites of `parity`, acting on a half field of the other parity."""
+        U_f, U_b, n_f, n_b = self._gather[parity]
+        out = np.zeros_like(psi)
+        spins = (psi.shape[0], 4, -1)
+        halves = (psi.shape[0], 2, 3, -1)
+        proj = _spin_proj(self.dtype)
+        for mu in range(4):
+            (Rm, Pm), (Rp, Pp) = proj[mu]
+            h = full_links(U_f[mu][:, None]) @ (Pm @ psi.reshape(spins))[n_f[mu]].reshape(halves)
+            out += (Rm @ h.reshape(psi.shape[0], 2, -1)).reshape(psi.shape)
+            h = full_links(U_b[mu][:, None]) @ (Pp @ psi.reshape(spins))[n_b[mu]].reshape(halves)
+            out += (Rp @ h.reshape(psi.shape[0], 2, -1)).reshape(psi.shape)
+        return out
+
+    def split(self, psi: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        flat = psi.reshape((-1,) + psi.shape[4:])
+        return flat[self.sites[0]], flat[self.sites[1]]
+
+    def join(self, even: np.ndarray, odd: np.ndarray) -> np.ndarray:
+        flat = np.empty((even.shape[0] + odd.shape[0],) + even.shape[1:], dtype=even.dtype)
+        flat[self.sites[0]] = even
+        flat[self.sites[1]] = odd
+        return flat.reshape(self.shape + even.shape[1:])
+
+    def schur(self, x_e: np.ndarray, kappa: float) -> np.ndarray:
+        """Even-site Schur complement (1 - κ² H_eo H_oe) x_e."""
+        return x_e - kappa * kappa * self.hop(self.hop(x_e, 1), 0)
+
+
+def _coldot(a: np.ndarray, b: np.ndarray) -> np.ndarray:
+    """Inner products <a_n, b_n> of matching columns (last axis)."""
+    return np.sum(a.conj() * b, axis=tuple(range(a.ndim - 1)))
+
+
+# Krylov solvers on a block of right-hand sides. Each takes (A, A†, b, tol,
+# maxiter, x0=None), runs one independent recursion per column of b (last
+# axis), drops converged columns from the working block and returns
+# (x, iterations, operator applications, per-column convergence flags).
+
+def _cgne_block(D: Callable[[np.ndarray], np.ndarray], Dh: Callable[[np.ndarray], np.ndarray],
+                src: np.ndarray, tol: float, maxiter: int,
+                x0: np.ndarray | None = None) -> Tuple[np.ndarray, int, int, np.ndarray]:
+    """CG on D†D x = D† src; a column stops when |D†(src - D x)| <= tol |D† src|."""
+    x = np.zeros_like(src) if x0 is None else x0.astype(src.dtype)
+    b = Dh(src if x0 is None else src - D(x))
+    # relative to |D† src| like the other SOLVERS are to |src|, so tol means the same for any source norm
+    bnorm = np.sqrt(_colnorm2(b if x0 is None else Dh(src)))
+    out = np.zeros_like(b)
+    active = np.arange(b.shape[-1])
+    conv = np.zeros(b.shape[-1], dtype=bool)
+    r = b.copy()
+    p = r.copy()
+    rs = _colnorm2(r)
+    conv[rs == 0.0] = True
+    keep = rs != 0.0
+    it = 0
+
+    while it < maxiter:
+        if not keep.all():
+            out[..., active[~keep]] = x[..., ~keep]
+            active, x, r, p, rs = active[keep], x[..., keep], r[..., keep], p[..., keep], rs[keep]
+            bnorm = bnorm[keep]
+        if active.size == 0:
+            break
+        Ap = Dh(D(p))
+        it += 1
+        pAp = _coldot(p, Ap).real
+        keep = pAp > 0
+        a = np.where(keep, rs / np.where(keep, pAp, 1.0), 0.0)
+        x = x + a * p
+        r = r - a * Ap
+        rs_new = _colnorm2(r)
+        done = keep & (np.sqrt(rs_new) <= tol * bnorm)
+        conv[active[done]] = True
+        keep &= ~done
+        p = r + (rs_new / rs) * p
+        rs = rs_new
+    out[..., active] = x
+    return out, it, 2 * it + 1 + 2 * (x0 is not None), conv
+
+
+def _bicgstab_block(A: Callable[[np.ndarray], np.ndarray], Ah: Callable[[np.ndarray], np.ndarray],
+                    b: np.ndarray, tol: float, maxiter: int,
+                    x0: np.ndarray | None = None) -> Tuple[np.ndarray, int, int, np.ndarray]:
+    """BiCGStab on A x = b directly; a column stops when |b - A x| <= tol |b|."""
+    out = np.zeros_like(b)
+    active = np.arange(b.shape[-1])
+    bnorm = np.sqrt(_colnorm2(b))
+    conv = bnorm == 0.0
+    x = np.zeros_like(b) if x0 is None else x0.astype(b.dtype)
+    r = b.copy() if x0 is None else b - A(x)
+    # Random shadow residual: r0 itself breaks down for point sources (see bicgstab_multishift).
+    g = np.random.default_rng(0)
+    rhat = (g.normal(size=r.shape) + 1j * g.normal(size=r.shape)).astype(b.dtype)
+    p = r.copy()
+    rho = _coldot(rhat, r)
+    keep = ~conv
+    it = 0
+
+    while it < maxiter:
+        if not keep.all():
+            out[..., active[~keep]] = x[..., ~keep]
+            active, bnorm = active[keep], bnorm[keep]
+            x, r, rhat, p, rho = x[..., keep], r[..., keep], rhat[..., keep], p[..., keep], rho[keep]
+        if active.size == 0:
+            break
+        v = A(p)
+        rv = _coldot(rhat, v)
+        ok = rv != 0
+        alpha = np.where(ok, rho / np.where(ok, rv, 1.0), 0.0)
+        s = r - alpha * v
+        t = A(s)
+        it += 1
+        tt = _colnorm2(t)
+        omega = np.where(tt > 0, _coldot(t, s) / np.where(tt > 0, tt, 1.0), 0.0)
+        x = x + alpha * p + omega * s
+        r = s - omega * t
+        done = ok & (np.sqrt(_colnorm2(r)) <= tol * bnorm)
+        conv[active[done]] = True
+        ok &= (omega != 0) & (rho != 0)
+        rho_new = _coldot(rhat, r)
+        beta = np.where(ok, (rho_new / np.where(rho != 0, rho, 1.0)) * (alpha / np.where(omega != 0, omega, 1.0)), 0.0)
+        p = r + beta * (p - omega * v)
+        rho = rho_new
+        keep = ok & ~done
+    out[..., active] = x
+    return out, it, 2 * it + (x0 is not None), conv
+
+
+def _gcr_block(A: Callable[[np.ndarray], np.ndarray], Ah: Callable[[np.ndarray], np.ndarray],
+               b: np.ndarray, tol: float, maxiter: int,
+               x0: np.ndarray | None = None, restart: int = 12) -> Tuple[np.ndarray, int, int, np.ndarray]:
+    """GCR(restart) on A x = b directly; a column stops when |b - A x| <= tol |b|.
+
+    Each new direction A p is orthonormalised against the last `restart` ones,
+    so |r| decreases monotonically; the basis is dropped and rebuilt from the
+    current residual every `restart` iterations.
+    """
+    out = np.zeros_like(b)
+    active = np.arange(b.shape[-1])
+    bnorm = np.sqrt(_colnorm2(b))
+    conv = bnorm == 0.0
+    x = np.zeros_like(b) if x0 is None else x0.astype(b.dtype)
+    r = b.copy() if x0 is None else b - A(x)
+    ps: List[np.ndarray] = []
+    qs: List[np.ndarray] = []
+    keep = ~conv
+    it = 0
+
+    while it < maxiter:
+        if not keep.all():
+            out[..., active[~keep]] = x[..., ~keep]
+            active, bnorm, x, r = active[keep], bnorm[keep], x[..., keep], r[..., keep]
+            ps = [v[..., keep] for v in ps]
+            qs = [v[..., keep] for v in qs]
+        if active.size == 0:
+            break
+        if len(ps) == restart:
+            ps, qs = [], []
+        p = r.copy()
+        q = A(p)
+        it += 1
+        for pj, qj in zip(ps, qs):
+            c = _coldot(qj, q)
+            q = q - c * qj
+            p = p - c * pj
+        qn = np.sqrt(_colnorm2(q))
+        ok = qn > 0
+        q = q / np.where(ok, qn, 1.0)
+        p = p / np.where(ok, qn, 1.0)
+        a = _coldot(q, r)
+        x = x + a * p
+        r = r - a * q
+        ps.append(p)
+        qs.append(q)
+        done = ok & (np.sqrt(_colnorm2(r)) <= tol * bnorm)
+        conv[active[done]] = True
+        keep = ok & ~done
+    out[..., active] = x
+    return out, it, it + (x0 is not None), conv
+
+
+SOLVERS = {"cg": _cgne_block, "bicgstab": _bicgstab_block, "gcr": _gcr_block}
+
+
+@dataclass
+class SolveResult:
+    """Outcome of solve_dirac: the solution, what it cost and whether to trust it."""
+    x: np.ndarray
+    method: str
+    iterations: int      # solver iterations (the slowest column)
+    matvecs: int         # applications of D (or of the even-odd Schur operator)
+    residual: float      # true residual max_n |src_n - D x_n| / |src_n|
+    elapsed: float       # seconds
+    converged: bool      # every column met the solver's stopping criterion
+
+
+def _defect_correction(A: Callable[[np.ndarray], np.ndarray], A_lo: Callable[[np.ndarray], np.ndarray],
+                       Ah_lo: Callable[[np.ndarray], np.ndarray], b: np.ndarray, solver: Callable,
+                       tol: float, maxiter: int, x0: np.ndarray | None = None, inner_tol: float = 1e-5,
+                       max_outer: int = 50) -> Tuple[np.ndarray, int, int, np.ndarray]:
+    """Mixed-precision defect correction around one of SOLVERS.
+
+    The inner solver runs on single-precision copies of the operator and of the
+    (column-normalised) residual to relative accuracy ~inner_tol; the outer loop
+    accumulates x and recomputes the true residual b - A x in double precision
+    (reliable update) until |b - A x| <= tol |b| per column.
+    """
+    x = np.zeros_like(b) if x0 is None else x0.astype(b.dtype)
+    r = b.copy() if x0 is None else b - A(x)
+    bnorm = np.sqrt(_colnorm2(b))
+    conv = bnorm == 0.0
+    it, nmv = 0, int(x0 is not None)
+    for _ in range(max_outer):
+        rn = np.sqrt(_colnorm2(r))
+        conv |= rn <= tol * bnorm
+        act = ~conv
+        if not act.any() or it >= maxiter:
+            break
+        # no need to solve the last correction more accurately than tol requires
+        tol_in = max(inner_tol, 0.5 * float(np.min(tol * bnorm[act] / rn[act])))
+        e, i, m, _ = solver(A_lo, Ah_lo, (r[..., act] / rn[act]).astype(np.complex64), tol_in, maxiter - it)
+        it, nmv = it + i, nmv + m
+        x[..., act] += e.astype(b.dtype) * rn[act]
+        r = b - A(x)
+        nmv += 1
+    return x, it, nmv, conv
+
+
+def lowest_eigenpairs(A: Callable[[np.ndarray], np.ndarray], shape: Tuple[int, ...], n_ev: int,
+                      tol: float = 1e-6, m: int | None = None, max_restarts: int = 200,
+                      seed: int = 0) -> Tuple[np.ndarray, np.ndarray, int]:
+    """Lowest n_ev eigenpairs of a Hermitian positive operator (thick-restart Lanczos).
+
+    A acts on blocks shape + (n,). The Krylov basis (size m) is fully
+    reorthogonalised and A V is stored alongside V, so the Rayleigh-Ritz matrix
+    is formed directly; on restart the lowest Ritz vectors are kept and the
+    basis is extended from the last Krylov residual. Converged when every
+    wanted Ritz residual is below tol * (largest Ritz value).
+    Returns (eigenvalues [n_ev], eigenvectors shape + (n_ev,), matvecs,
+    largest Ritz residual / largest Ritz value); the last is above tol if
+    max_restarts ran out first.
+    """
+    N = int(np.prod(shape))
+    m = m or max(2 * n_ev + 10, 24)
+    if not 0 < n_ev < m <= N:
+        raise ValueError(f"need 0 < n_ev < m <= {N} (n_ev={n_ev}, m={m})")
+    keep = n_ev + (m - n_ev) // 2
+    V = np.empty((N, m), dtype=np.complex128)
+    W = np.empty_like(V)
+    rng = np.random.default_rng(seed)
+    v = rng.normal(size=N) + 1j * rng.normal(size=N)
+    k = n_mv = 0
+    for _ in range(max_restarts):
+        while k < m:
+            for _ in range(2):
+                v = v - V[:, :k] @ (V[:, :k].conj().T @ v)
+            nv = np.linalg.norm(v)
+            if nv < 1e-12:          # invariant subspace: continue from a fresh direction
+                v = rng.normal(size=N) + 1j * rng.normal(size=N)
+                continue
+            V[:, k] = v / nv
+            W[:, k] = A(V[:, k].reshape(shape + (1,))).reshape(N)
+            n_mv += 1
+            v = W[:, k]
+            k += 1
+        f = v - V @ (V.conj().T @ v)       # next Krylov direction, ⊥ the whole basis
+        Hm = V.conj().T @ W
+        theta, S = np.linalg.eigh(0.5 * (Hm + Hm.conj().T))
+        Y, AY = V @ S[:, :keep], W @ S[:, :keep]
+        res = np.linalg.norm(AY[:, :n_ev] - Y[:, :n_ev] * theta[:n_ev], axis=0)
+        if np.all(res <= tol * theta[-1]):
+            break
+        V[:, :keep], W[:, :keep], k, v = Y, AY, keep, f
+    return theta[:n_ev], Y[:, :n_ev].reshape(shape + (n_ev,)), n_mv, float(res.max() / theta[-1])
+
+
+class LowModeDeflation:
+    """Low modes of the even-odd normal operator, kept for one gauge configuration.
+
+    The lowest n_ev eigenvectors V of M†M, M = 1 - κ² H_eo H_oe at the given
+    κ (use the lightest quark), are computed once. For any κ, solve_dirac then
+    starts from the minimal-residual guess x0 = V c, c = argmin |b - M(κ) V c|,
+    which removes the slow low-mode components from every source; the QR
+    factors of M(κ) V are cached per κ. nbytes is the memory held; residual
+    is the relative Ritz residual reached and converged whether it met tol
+    (unconverged modes still deflate, only less well).
+    """
+
+    def __init__(self, U: np.ndarray, kappa: float, n_ev: int, tol: float = 1e-6,
+                 eo: EvenOddWilson | None = None):
+        self.eo = eo if eo is not None else EvenOddWilson(U)
+        self.kappa = float(kappa)
+        shape = (self.eo.sites[0].size, 4, 3)
+
+        def A(x: np.ndarray) -> np.ndarray:
+            y = self.eo.schur(x, kappa)
+            return _g5_block(self.eo.schur(_g5_block(y), kappa))
+
+        self.evals, self.V, self.matvecs, self.residual = lowest_eigenpairs(A, shape, n_ev, tol=tol)
+        self.converged = self.residual <= tol
+        self._qr: Dict[float, Tuple[np.ndarray, np.ndarray]] = {}
+
+    @property
+    def nbytes(self) -> int:
+        return self.V.nbytes + sum(Q.nbytes + R.nbytes for Q, R in self._qr.values())
+
+    def guess(self, kappa: float, b: np.ndarray) -> np.ndarray:
+        """Minimal-residual start vector in span(V) for M(κ) x = b (b is [V/2,4,3,n])."""
+        kappa = float(kappa)
+        if kappa not in self._qr:
+            MV = self.eo.schur(self.V, kappa)
+            self._qr[kappa] = np.linalg.qr(MV.reshape(-1, MV.shape[-1]))
+        Q, R = self._qr[kappa]
+        c = np.linalg.solve(R, Q.conj().T @ b.reshape(Q.shape[0], -1))
+        return (self.V.reshape(Q.shape[0], -1) @ c).reshape(b.shape)
+
+
+PRECISIONS = ("double", "mixed")
+
+
+def solve_dirac(U: np.ndarray, kappa: float, src: np.ndarray, L: int, T: int,
+                method: str = "cg", tol: float = 1e-10, maxiter: int = 500,
+                eo: bool | EvenOddWilson = True, precision: str = "double",
+                deflation: LowModeDeflation | None = None) -> SolveResult:
+    """Solve D x = src (single field or block) with one of SOLVERS.
+
+    "cg" works on the normal equations (robust, squares the condition number);
+    "bicgstab" and "gcr" work on D itself. With eo (True or a cached
+    EvenOddWilson) the solver sees the even-site Schur complement
+    1 - κ² H_eo H_oe with right-hand side b_e + κ H_eo b_o, and the odd half is
+    reconstructed as x_o = b_o + κ H_oe x_e; eo=True falls back to the
+    full-lattice solve when L or T is odd. precision="mixed" runs the solver
+    in complex64 inside a complex128 defect-correction loop (_defect_correction);
+    the stopping criterion is then the true relative residual for every method.
+    A LowModeDeflation supplies the starting guess (and its even-odd operator).
+    """
+    if method not in SOLVERS:
+        raise ValueError(f"unknown solver: {method}")
+    if precision not in PRECISIONS:
+        raise ValueError(f"unknown precision: {precision}")
+    solver = SOLVERS[method]
+    t_start = time.perf_counter()
+    multi = src.ndim == 7
+    b = src if multi else src[..., None]
+
+    def ops(op: np.ndarray | EvenOddWilson) -> Tuple[Callable, Callable]:
+        if isinstance(op, EvenOddWilson):
+            def A(x: np.ndarray) -> np.ndarray:
+                return op.schur(x, kappa)
+        else:
+            def A(x: np.ndarray) -> np.ndarray:
+                return apply_D(op, x, kappa, L, T)
+
+        def Ah(x: np.ndarray) -> np.ndarray:
+            # γ5-hermiticity: D† = γ5 D γ5, and it survives the Schur complement
+            return _g5_block(A(_g5_block(x)))
+        return A, Ah
+
+    if deflation is not None:
+        eo = deflation.eo
+    elif eo is True and (L % 2 or T % 2):
+        eo = False
+    if eo is not False:
+        eo = eo if isinstance(eo, EvenOddWilson) else EvenOddWilson(U)
+        b_e, b_o = eo.split(b)
+        rhs, hi = b_e + kappa * eo.hop(b_o, 0), eo
+        lo = eo.single() if precision == "mixed" else None
+    else:
+        rhs, hi = b, U
+        lo = U.astype(np.complex64) if precision == "mixed" else None
+
+    A, Ah = ops(hi)
+    y0 = deflation.guess(kappa, rhs) if deflation is not None else None
+    if lo is not None:
+        y, it, nmv, conv = _defect_correction(A, *ops(lo), rhs, solver, tol, maxiter, x0=y0)
+    else:
+        y, it, nmv, conv = solver(A, Ah, rhs, tol, maxiter, x0=y0)
+    x = eo.join(y, b_o + kappa * eo.hop(y, 1)) if eo is not False else y
+
+    bnorm = np.sqrt(_colnorm2(b))
+    res = np.sqrt(_colnorm2(b - apply_D(U, x, kappa, L, T))) / np.where(bnorm > 0, bnorm, 1.0)
+    return SolveResult(x=x if multi else x[..., 0], method=method, iterations=it, matvecs=nmv,
+                       residual=float(res.max()), elapsed=time.perf_counter() - t_start,
+                       converged=bool(conv.all()))
+
+
+def bicgstab_multishift(U: np.ndarray, kappas: List[float], src: np.ndarray, L: int, T: int,
+                        tol: float = 1e-10, maxiter: int = 600) -> List[np.ndarray]:
+    """Solve D(κ) x = src for every κ from one shared Krylov sequence.
+
+    D(κ)/κ = 1/κ - H, so all operators are shifts of A = 1/κ0 - H with
+    κ0 = max(kappas) and σ = 1/κ - 1/κ0 >= 0. BiCGStab runs on the base
+    system; the shifted iterates follow from scalar recurrences (BiCGStab-M,
+    Jegerlehner hep-lat/9612014) at the cost of a few vector updates per κ and
+    no extra applications of H. src may carry a trailing block axis; every
+    column has its own recurrence and stops once all its shifted residuals are
+    below tol*|src|. Returns one solution per κ, in the order given; raises
+    RuntimeError if a column breaks down or runs out of iterations first.
+    """
+    kap = np.asarray(kappas, dtype=np.float64)
+    if kap.ndim != 1 or kap.size == 0 or not np.all(kap > 0):
+        raise ValueError("kappas must be a non-empty list of positive values")
+    multi = src.ndim == 7
+    b = src if multi else src[..., None]
+    n = b.shape[-1]
+    inv0 = 1.0 / kap.max()
+    sig = (1.0 / kap - inv0)[:, None]                     # [ns, 1]
+
+    def A(y: np.ndarray) -> np.ndarray:
+        return inv0 * y - apply_hop(U, y)
+
+    def vs(c: np.ndarray) -> np.ndarray:
+        # [ns, n] scalars -> broadcastable against [ns, ..., n] vectors
+        return c.reshape(c.shape[0], *([1] * (b.ndim - 1)), c.shape[1])
+
+    out = np.zeros((kap.size,) + b.shape, dtype=np.complex128)
+    active = np.arange(n)
+    bnorm = np.sqrt(_colnorm2(b))
+    r = b.astype(np.complex128)
+    # Shadow residual: r0 itself breaks down at once for point sources, since
+    # (1-γ)(1+γ) = 0 kills every backtracking path and <r0, r1> = 0.
+    g = np.random.default_rng(0)
+    rhat = g.normal(size=r.shape) + 1j * g.normal(size=r.shape)
+    p = r.copy()
+    rho = _coldot(rhat, r)
+    xs = np.zeros_like(out)
+    ps = np.broadcast_to(r, out.shape).copy()
+    pi = np.ones((kap.size, n), dtype=np.complex128)
+    theta = np.ones_like(pi)
+    cz = np.ones_like(pi)
+    keep = bnorm != 0.0
+    conv = ~keep
+
+    for _ in range(maxiter):
+        if not keep.all():
+            out[..., active[~keep]] = xs[..., ~keep]
+            active, bnorm = active[keep], bnorm[keep]
+            r, rhat, p, rho = r[..., keep], rhat[..., keep], p[..., keep], rho[keep]
+            xs, ps = xs[..., keep], ps[..., keep]
+            pi, theta, cz = pi[:, keep], theta[:, keep], cz[:, keep]
+        if active.size == 0:
+            break
+        v = A(p)
+        rv = _coldot(rhat, v)
+        ok = rv != 0
+        alpha = np.where(ok, rho / np.where(ok, rv, 1.0), 0.0)
+        s = r - alpha * v
+        t = A(s)
+        tt = _coldot(t, t).real
+        ok &= tt > 0
+        omega = np.where(ok, _coldot(t, s) / np.where(tt > 0, tt, 1.0), 0.0)
+
+        # shifted systems: r^σ = r / (c π), (A+σ) p^σ = (r^σ - s^σ) / α^σ
+        pi_new = pi + alpha * sig * theta
+        a_s = alpha * pi / pi_new
+        o_s = omega / (1.0 + omega * sig)
+        s_s = s / vs(cz * pi_new)
+        Ap_s = (r / vs(cz * pi) - s_s) / vs(np.where(a_s != 0, a_s, 1.0))
+        xs += vs(a_s) * ps + vs(o_s) * s_s
+
+        r = s - omega * t
+        rho_new = _coldot(rhat, r)
+        ok &= (rho != 0) & (omega != 0)
+        beta = np.where(ok, (rho_new / np.where(rho != 0, rho, 1.0)) * (alpha / np.where(omega != 0, omega, 1.0)), 0.0)
+        p = r + beta * (p - omega * v)
+        cz = cz * (1.0 + omega * sig)
+        b_s = beta * (pi / pi_new) ** 2
+        ps = r / vs(cz * pi_new) + vs(b_s) * (ps - vs(o_s) * Ap_s)
+        theta = pi_new + beta * theta
+        pi, rho = pi_new, rho_new
+
+        res = np.sqrt(_colnorm2(r)) / np.abs(cz * pi)    # [ns, n]
+        done = np.all(res < tol * bnorm, axis=0)
+        conv[active[done]] = True
+        keep = ok & ~done
+    out[..., active] = xs
+    if not conv.all():
+        raise RuntimeError(f"multi-shift BiCGStab: {int((~conv).sum())} of {n} columns did not converge "
+                           f"in {maxiter} iterations")
+    # D(κ) x = κ (1/κ - H) x = src  =>  x = y / κ
+    sols = [out[i] / kap[i] for i in range(kap.size)]
+    return sols if multi else [x[..., 0] for x in sols]
 
 
 def cg_solve(U: np.ndarray, kappa: float, src: np.ndarray, L: int, T: int,
@@ -358,9 +1565,44 @@ def cg_solve(U: np.ndarray, kappa: float, src: np.ndarray, L: int, T: int,
     return x
 
 
+def _point_sources(L: int, T: int, x0=(0, 0, 0, 0)) -> np.ndarray:
+    """The 12 spin-colour point sources at x0 as one block, column 3*s0 + c0."""
+    src = np.zeros((T, L, L, L, 4, 3, 12), dtype=np.complex128)
+    for s0 in range(4):
+        for c0 in range(3):
+            src[tuple(x0) + (s0, c0, 3 * s0 + c0)] = 1.0
+    return src
+
+
+def _prop_from_block(psi: np.ndarray, L: int, T: int) -> np.ndarray:
+    # columns are (s0, c0); sink spin/color live in psi axes
+    return np.ascontiguousarray(np.transpose(psi.reshape(T, L, L, L, 4, 3, 4, 3), (0, 1, 2, 3, 4, 6, 5, 7)))
+
+
 def prop_from_point(U: np.ndarray, kappa: float, L: int, T: int, x0=(0, 0, 0, 0),
-                    tol: float = 1e-10, maxiter: int = 600) -> np.ndarray:
-    """Point-to-all propagator S(x;0) as array [t,x,y,z, spin_sink, spin_src, col_sink, col_src]."""
+                    tol: float = 1e-10, maxiter: int = 600, block: bool = True,
+                    eo: bool = True, method: str = "cg", precision: str = "double",
+                    deflation: LowModeDeflation | None = None,
+                    smearing: QuarkSmearing | None = None) -> np.ndarray:
+    """Point-to-all propagator S(x;0) as array [t,x,y,z, spin_sink, spin_src, col_sink, col_src].
+
+    With block=True all 12 spin-colour sources are solved together by
+    solve_dirac(method, eo, precision, deflation) and a solve that misses its stopping criterion
+    raises RuntimeError; block=False runs cg_solve once per source (reference).
+    With smearing the sources are smeared around x0 (point sink); smearing.sink
+    turns the result into the smeared-smeared propagator.
+    """
+    if smearing is not None and not block:
+        raise ValueError("smeared sources need the block solver")
+    if block:
+        src = _point_sources(L, T, x0)
+        src = smearing.apply(src) if smearing is not None else src
+        res = solve_dirac(U, kappa, src, L, T, method, tol=tol, maxiter=maxiter,
+                          eo=eo, precision=precision, deflation=deflation)
+        if not res.converged:
+            raise RuntimeError(f"{method} solve at kappa={kappa} not converged after {res.iterations} "
+                               f"iterations (residual {res.residual:.2e})")
+        return _prop_from_block(res.x, L, T)
     t0, x1_0, x2_0, x3_0 = x0
     S = np.zeros((T, L, L, L, 4, 4, 3, 3), dtype=np.complex128)
     for s0 in range(4):
@@ -369,26 +1611,268 @@ def prop_from_point(U: np.ndarray, kappa: float, L: int, T: int, x0=(0, 0, 0, 0)
             src[t0, x1_0, x2_0, x3_0, s0, c0] = 1.0
             psi = cg_solve(U, kappa, src, L, T, tol=tol, maxiter=maxiter)
             S[..., :, s0, :, c0] = psi  # sink spin/color live in psi axes
-    # Rearrange to [.., s_sink, s_src, c_sink, c_src]
-    S = np.transpose(S, (0, 1, 2, 3, 4, 5, 6, 7))
     return S
 
 
+def props_from_point(U: np.ndarray, kappas: List[float], L: int, T: int, x0=(0, 0, 0, 0),
+                     tol: float = 1e-10, maxiter: int = 600,
+                     smearing: QuarkSmearing | None = None) -> List[np.ndarray]:
+    """Point-to-all propagators for every κ from one multi-shift solve (see prop_from_point)."""
+    src = _point_sources(L, T, x0)
+    src = smearing.apply(src) if smearing is not None else src
+    sols = bicgstab_multishift(U, kappas, src, L, T, tol=tol, maxiter=maxiter)
+    return [_prop_from_block(psi, L, T) for psi in sols]
+
+
+SOURCES = ("point", "wall", "z2", "z4")
+DILUTIONS = ("spin", "spin-colour")
+
+
+def stochastic_sources(L: int, T: int, rng: np.random.Generator, kind: str = "z2",
+                       dilution: str = "spin", t0: int = 0) -> np.ndarray:
+    """Timeslice sources η(x) δ(x_0, t0) as a block [T,L,L,L,4,3,n].
+
+    kind "z2" draws η = ±1 and "z4" η in {±1, ±i} independently per spatial
+    site (and colour, unless diluted); "wall" uses η = 1. Spin dilution gives
+    n = 4 columns (spin s0 = column), spin-colour dilution n = 12 (column
+    3*s0 + c0). Since E[η η*] = 1 site by site, quadratic contractions of the
+    solutions average to the source-position sum of point correlators. A wall
+    is not gauge fixed here: its off-diagonal x != x' terms only cancel in the
+    gauge average, so it needs more configurations than a noise source.
+    """
+    if kind not in SOURCES[1:]:
+        raise ValueError(f"unknown stochastic source: {kind}")
+    if dilution not in DILUTIONS:
+        raise ValueError(f"unknown dilution: {dilution}")
+    nc = 3 if dilution == "spin-colour" else 1
+    shape = (L, L, L, 1 if nc == 3 else 3)
+    if kind == "wall":
+        eta = np.ones(shape, dtype=np.complex128)
+    elif kind == "z2":
+        eta = rng.choice([-1.0, 1.0], size=shape).astype(np.complex128)
+    else:
+        eta = rng.choice(np.array([1.0, -1.0, 1j, -1j]), size=shape)
+    src = np.zeros((T, L, L, L, 4, 3, 4 * nc), dtype=np.complex128)
+    for s0 in range(4):
+        if nc == 1:
+            src[t0, :, :, :, s0, :, s0] = eta
+        else:
+            for c0 in range(3):
+                src[t0, :, :, :, s0, c0, 3 * s0 + c0] = eta[..., 0]
+    return src
+
+
+def props_from_stochastic(U: np.ndarray, kappas: List[float], L: int, T: int, rng: np.random.Generator,
+                          kind: str = "z2", dilution: str = "spin", t0: int = 0,
+                          multishift: bool = True, smearing: QuarkSmearing | None = None,
+                          tol: float = 1e-10, maxiter: int = 600, **solve_kw: Any) -> List[np.ndarray]:
+    """One stochastic_sources hit solved at every κ, as propagator-like arrays.
+
+    Returns per κ P[t,x,y,z, s, s0, c, c0] = Σ_x' S(x;x') η(x') / L^{3/2} with
+    t measured from t0 and c0 of extent 3 (spin-colour dilution) or 1 (colour
+    noise). pion_corr and meson_engine accept P like a point propagator; the
+    normalisation makes their expectation the point correlator averaged over
+    all L^3 source sites of the timeslice. Baryons need a point source.
+    Multi-shift or per-κ solve_dirac (solve_kw) as for point sources.
+    """
+    src = stochastic_sources(L, T, rng, kind, dilution, t0)
+    if smearing is not None:
+        src = smearing.apply(src)
+    if multishift:
+        sols = bicgstab_multishift(U, kappas, src, L, T, tol=tol, maxiter=maxiter)
+    else:
+        sols = []
+        for kappa in kappas:
+            res = solve_dirac(U, kappa, src, L, T, tol=tol, maxiter=maxiter, **solve_kw)
+            if not res.converged:
+                raise RuntimeError(f"{res.method} solve at kappa={kappa} not converged after "
+                                   f"{res.iterations} iterations (residual {res.residual:.2e})")
+            sols.append(res.x)
+    nc = src.shape[-1] // 4
+    out = []
+    for psi in sols:
+        P = psi.reshape(T, L, L, L, 4, 3, 4, nc).transpose(0, 1, 2, 3, 4, 6, 5, 7)
+        out.append(np.roll(P, -t0, axis=0) / L ** 1.5)
+    return out
+
+
 # ----------------------------
 # Hadron correlators (zero-momentum)
 # ----------------------------
 
+@functools.lru_cache(maxsize=None)
+def _einsum_path(subscripts: str, *shapes: Tuple[int, ...]) -> List[Any]:
+    dummies = [np.empty(sh, dtype=np.complex128) for sh in shapes]
+    return np.einsum_path(subscripts, *dummies, optimize='optimal')[0]
+
+
+def _einsum(subscripts: str, *operands: np.ndarray) -> np.ndarray:
+    """np.einsum with the contraction path optimised once per (subscripts, shapes)."""
+    path = _einsum_path(subscripts, *(op.shape for op in operands))
+    return np.einsum(subscripts, *operands, optimize=path)
+
+
+def _levi_civita() -> np.ndarray:
+    eps = np.zeros((3, 3, 3))
+    for a, b, c, sgn in [(0, 1, 2, 1), (1, 2, 0, 1), (2, 0, 1, 1), (0, 2, 1, -1), (2, 1, 0, -1), (1, 0, 2, -1)]:
+        eps[a, b, c] = sgn
+    return eps
+
+
+EPS3 = _levi_civita()
+CGAMMA5 = GAMMA[2] @ GAMMA[0] @ G5   # Cγ5 diquark (Euclidean charge conjugation C = γ2 γ0)
+PMINUS = 0.5 * (np.eye(4, dtype=np.complex128) - GAMMA[0])  # negative parity projector
+
+# Meson interpolators ψ̄ Γ ψ; a channel with several Γ is averaged over them.
+MESON_CHANNELS: Dict[str, np.ndarray] = {
+    "pi": np.stack([G5]),                                            # 0-+
+    "a0": np.stack([np.eye(4, dtype=np.complex128)]),                # 0++
+    "rho": np.stack([GAMMA[k] for k in (1, 2, 3)]),                  # 1--
+    "a1": np.stack([GAMMA[k] @ G5 for k in (1, 2, 3)]),              # 1++
+    "b1": np.stack([GAMMA[j] @ GAMMA[k] for j, k in ((2, 3), (3, 1), (1, 2))]),  # 1+-
+}
+
+
+def _dirac_basis() -> Tuple[Tuple[str, ...], np.ndarray]:
+    names, mats = ["1", "g5"], [np.eye(4, dtype=np.complex128), G5]
+    for mu in range(4):
+        names.append(f"g{mu}")
+        mats.append(GAMMA[mu])
+    for mu in range(4):
+        names.append(f"g{mu}g5")
+        mats.append(GAMMA[mu] @ G5)
+    for mu in range(4):
+        for nu in range(mu + 1, 4):
+            names.append(f"g{mu}g{nu}")
+            mats.append(GAMMA[mu] @ GAMMA[nu])
+    return tuple(names), np.stack(mats)
+
+
+# The 16 Dirac structures Γ of meson bilinears ψ̄ Γ ψ
+DIRAC_NAMES, DIRAC_BASIS = _dirac_basis()
+
+
+@functools.lru_cache(maxsize=None)
+def momentum_phases(L: int, momenta: Tuple[Tuple[int, int, int], ...]) -> np.ndarray:
+    """Phase table e^{-i p·x}, p = 2π n / L, as [P, L^3] over flat spatial sites."""
+    n = np.asarray(momenta, dtype=np.float64).reshape(-1, 3)
+    x = np.indices((L, L, L)).reshape(3, -1)
+    ph = np.exp(-2j * np.pi / L * (n @ x))
+    ph.flags.writeable = False
+    return ph
+
+
+def meson_engine(S: np.ndarray, gammas: np.ndarray = DIRAC_BASIS,
+                 momenta: Tuple[Tuple[int, int, int], ...] = ((0, 0, 0),)) -> np.ndarray:
+    """Meson correlators for every sink/source pair of Γ at every momentum, in one pass.
+
+    C[g,h,p,t] = -Σ_x e^{-ip·x} Tr[Γ_g S(x,0) Γ̄_h γ5 S(x,0)† γ5], Γ̄ = γ0 Γ† γ0.
+    The Γ-independent tensor K_{jkml}(x) = Σ_ab S_{jk,ab} S*_{ml,ab} is built once
+    and momentum-projected with momentum_phases; each Γ pair is then a 4x4x4x4
+    contraction. gammas defaults to DIRAC_BASIS (names in DIRAC_NAMES). S may
+    also be a stochastic propagator (props_from_stochastic) with fewer c0.
+    """
+    T, L = S.shape[0], S.shape[1]
+    Q = S.reshape(T, -1, 4, 4, 3, S.shape[-1])
+    K = _einsum('txjkab,txmlab->txjkml', Q, Q.conj())
+    Kp = _einsum('px,txjkml->ptjkml', momentum_phases(L, tuple(map(tuple, momenta))), K)
+    g5G = G5 @ gammas                                            # cyclic: γ5 Γ
+    Gbar_g5 = GAMMA[0] @ np.conj(np.swapaxes(gammas, -1, -2)) @ GAMMA[0] @ G5
+    return -_einsum('gmj,ptjkml,hkl->ghpt', g5G, Kp, Gbar_g5)
+
+
+def meson_corr(S: np.ndarray, gammas: np.ndarray) -> np.ndarray:
+    """Zero-momentum C(t) = -Σ_x Tr[Γ S(x,0) Γ̄ γ5 S(x,0)† γ5], Γ̄ = γ0 Γ† γ0.
+
+    S(0,x) = γ5 S(x,0)† γ5 removes the backward propagator; averaged over the
+    stack of Γ matrices gammas[g,4,4] (see MESON_CHANNELS).
+    """
+    C = meson_engine(S, gammas)[..., 0, :]
+    return np.einsum('ggt->t', C).real / gammas.shape[0]
+
+
+# Channels run() reports beyond pi, rho and p (p_neg = negative-parity nucleon)
+EXTRA_CHANNELS = ("a0", "a1", "b1", "p_neg")
+
+
+def meson_corrs(S: np.ndarray) -> Dict[str, np.ndarray]:
+    """Every MESON_CHANNELS correlator from one meson_engine pass."""
+    gammas = np.concatenate(list(MESON_CHANNELS.values()))
+    C = np.einsum('ggt->gt', meson_engine(S, gammas)[..., 0, :]).real
+    out, i = {}, 0
+    for name, g in MESON_CHANNELS.items():
+        out[name] = C[i:i + len(g)].mean(axis=0)
+        i += len(g)
+    return out
+
+
+def nucleon_corrs(S: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """Direct-term nucleon correlators (Σ_x Tr[P± G(x)]) for both parities; see proton_corr_direct."""
+    T = S.shape[0]
+    S4 = S.reshape(T, -1, 4, 4, 3, 3)
+    # diquark D^{aa'bb'}(x) = Tr[(Cγ5) S^{bb'} (γ5 C) (S^{aa'})^T]
+    D = _einsum('ij,txjkbB,kl,txilaA->txaAbB', CGAMMA5, S4, G5 @ GAMMA[2] @ GAMMA[0], S4)
+    G = _einsum('abc,ABC,txaAbB,txsScC->tsS', EPS3, EPS3, D, S4)
+    return (_einsum('ij,tji->t', PPLUS, G).real, _einsum('ij,tji->t', PMINUS, G).real)
+
+
+def hadron_corrs(S: np.ndarray, momenta: List[Tuple[int, int, int]] = (),
+                 baryons: bool = True) -> Dict[str, np.ndarray]:
+    """The correlators run() measures on one propagator, keyed like its channels.
+
+    pi (pion_corr), the meson_corrs channels, p and p_neg (nucleon_corrs, if
+    baryons) and, for nonzero momenta, the pion at each momentum as "pi_p"
+    [n_p, T]. Every entry is local in t, so S may be streamed (stream_timeslices).
+    """
+    out = meson_corrs(S)
+    out["pi"] = pion_corr(S, S.shape[1], S.shape[0])
+    if baryons:
+        out["p"], out["p_neg"] = nucleon_corrs(S)
+    if len(momenta):
+        out["pi_p"] = meson_engine(S, MESON_CHANNELS["pi"], momenta)[0, 0].real
+    return out
+
+
+def stream_timeslices(S: np.ndarray, contract: Callable[[np.ndarray], Any], chunk: int = 1) -> Any:
+    """contract(S) for a timeslice-local contraction, evaluated chunk timeslices at a time.
+
+    contract returns an array with t as its last axis, or a tuple or dict of
+    such arrays; the blocks are joined along t. With S memory-mapped (see
+    PropagatorStore) only chunk timeslices are in memory at once.
+    """
+    parts = [contract(np.asarray(S[t:t + chunk])) for t in range(0, S.shape[0], chunk)]
+    if isinstance(parts[0], dict):
+        return {k: np.concatenate([p[k] for p in parts], axis=-1) for k in parts[0]}
+    if isinstance(parts[0], tuple):
+        return tuple(np.concatenate(c, axis=-1) for c in zip(*parts))
+    return np.concatenate(parts, axis=-1)
+
+
 def pion_corr(S: np.ndarray, L: int, T: int) -> np.ndarray:
     """C_pi(t)=Σ_x Tr[S(x) S(x)†] (uses γ5-hermiticity)."""
-    C = np.zeros(T, dtype=np.float64)
-    for t in range(T):
-        Q = S[t]  # [x,y,z, s,s0,c,c0]
-        C[t] = float(np.vdot(Q, Q).real)
-    return C
+    return np.sum(S.real ** 2 + S.imag ** 2, axis=tuple(range(1, S.ndim)))
 
 
 def rho_corr(S: np.ndarray, L: int, T: int) -> np.ndarray:
-    """Vector-meson (ρ) correlator using γ_k bilinear and γ5-hermiticity.
+    """Vector-meson (ρ) correlator, meson_corr over γ_1..γ_3 (rho_corr_scalar is the reference).
+
+    C_ρ(t)=Σ_x Σ_{k=1..3} Tr[ γ_k S(x,0) (γ_k γ5) S(x,0)† γ5 ], averaged over k.
+    """
+    return meson_corr(S, MESON_CHANNELS["rho"])
+
+
+def proton_corr_direct(S: np.ndarray, L: int, T: int) -> np.ndarray:
+    """Local proton correlator, direct term only (proton_corr_direct_scalar is the reference).
+
+    N_α(x)=ε^{abc}(u^a(x)^T Cγ5 d^b(x)) u^c_α(x), C(t)=Σ_x Tr[P+ G(x)].
+    """
+    return nucleon_corrs(S)[0]
+
+
+def rho_corr_scalar(S: np.ndarray, L: int, T: int) -> np.ndarray:
+    """Site-by-site reference for rho_corr.
+
+    Vector-meson (ρ) correlator using γ_k bilinear and γ5-hermiticity.
 
     C_ρ(t)=Σ_x Σ_{k=1..3} Tr[ γ_k S(x,0) (γ_k γ5) S(x,0)† γ5 ], averaged over k.
 
@@ -413,8 +1897,10 @@ def rho_corr(S: np.ndarray, L: int, T: int) -> np.ndarray:
         C[t] = float((acc.real) / 3.0)
     return C
 
-def proton_corr_direct(S: np.ndarray, L: int, T: int) -> np.ndarray:
-    """Very small but structurally correct local proton correlator (direct term only).
+def proton_corr_direct_scalar(S: np.ndarray, L: int, T: int) -> np.ndarray:
+    """Site-by-site reference for proton_corr_direct.
+
+    Very small but structurally correct local proton correlator (direct term only).
 
     N_α(x)=ε^{abc}(u^a(x)^T Cγ5 d^b(x)) u^c_α(x).
 
@@ -454,6 +1940,7 @@ def proton_corr_direct(S: np.ndarray, L: int, T: int) -> np.ndarray:
     return C
 
 
+
 def effective_mass_log(C: np.ndarray) -> float:
     """Crude effective mass from log ratios.
 
@@ -479,14 +1966,331 @@ def mass_from_corr(C: np.ndarray) -> float:
     return m
 
 
+# ----------------------------
+# Error analysis
+# ----------------------------
+
+ERROR_METHODS = ("jackknife", "bootstrap")
+
+
+def gamma_method(x: np.ndarray, s_tau: float = 1.5) -> Tuple[float, float, float, float]:
+    """(mean, error, τ_int, error of τ_int) of a Monte Carlo series by Wolff's Γ-method.
+
+    The window W is the first where exp(-W/τ_W) - τ_W/sqrt(W n) turns negative,
+    τ_W = s_tau / ln((2τ+1)/(2τ-1)), or where the running τ_int drops to 1/2;
+    it is searched up to n/2. C_F(W) carries Wolff's (1 + (2W+1)/n) bias
+    correction and τ_int is at least 1/2. Errors are NaN below two points.
+    """
+    x = np.asarray(x, dtype=np.float64)
+    n = len(x)
+    mean = float(x.mean()) if n else float('nan')
+    if n < 2:
+        return mean, float('nan'), float('nan'), float('nan')
+    d = x - mean
+    f = np.fft.rfft(d, n=2 * n)
+    gam = np.fft.irfft(f * np.conj(f))[:n // 2 + 1] / (n - np.arange(n // 2 + 1))
+    if gam[0] <= 0:
+        return mean, 0.0, 0.5, 0.0
+    W = n // 2
+    cf = gam[0]
+    for w in range(1, n // 2 + 1):
+        cf += 2.0 * gam[w]
+        tau = cf / (2.0 * gam[0])
+        if tau <= 0.5:
+            W = w
+            break
+        tau_w = s_tau / math.log((2.0 * tau + 1.0) / (2.0 * tau - 1.0))
+        if math.exp(-w / tau_w) - tau_w / math.sqrt(w * n) < 0:
+            W = w
+            break
+    cf = (gam[0] + 2.0 * gam[1:W + 1].sum()) * (1.0 + (2 * W + 1) / n)
+    tau = float(max(cf / (2.0 * gam[0]), 0.5))
+    return (mean, math.sqrt(2.0 * tau * gam[0] / n), tau,
+            tau * math.sqrt(max(4.0 * (W + 0.5 - tau), 0.0) / n))
+
+
+def bin_series(x: np.ndarray, bin_size: int) -> np.ndarray:
+    """Means over consecutive bins of bin_size along axis 0; a trailing partial bin is dropped."""
+    x = np.asarray(x)
+    nb = len(x) // bin_size
+    return x[:nb * bin_size].reshape((nb, bin_size) + x.shape[1:]).mean(axis=1)
+
+
+def resample_errors(samples: Dict[str, np.ndarray], f: Callable[[Dict[str, np.ndarray]], Dict[str, float]],
+                    method: str = "jackknife", n_boot: int = 200,
+                    rng: np.random.Generator | None = None) -> Tuple[Dict[str, float], Dict[str, float]]:
+    """Estimates f(means) and their jackknife or bootstrap errors.
+
+    samples maps names to arrays [n, ...] with a common first axis (bins of
+    measurements, see bin_series); f maps the dict of their means to a dict of
+    scalars. All n leave-one-out means, (Σx - x_i)/(n-1), or all n_boot
+    bootstrap means are formed at once per series; f is then evaluated once
+    per resample. Errors are NaN below two bins or where a resampled estimate
+    is missing or not finite.
+    """
+    if method not in ERROR_METHODS:
+        raise ValueError(f"unknown error method: {method}")
+    n = len(next(iter(samples.values())))
+    est = f({k: v.mean(axis=0) for k, v in samples.items()})
+    if n < 2:
+        return est, {k: float('nan') for k in est}
+    if method == "jackknife":
+        means = {k: (v.sum(axis=0) - v) / (n - 1) for k, v in samples.items()}
+    else:
+        idx = (rng if rng is not None else np.random.default_rng(0)).integers(n, size=(n_boot, n))
+        means = {k: v[idx].mean(axis=1) for k, v in samples.items()}
+    vals = [f({k: v[i] for k, v in means.items()}) for i in range(len(idx) if method == "bootstrap" else n)]
+    err: Dict[str, float] = {}
+    for key in est:
+        r = np.array([v.get(key, float('nan')) for v in vals], dtype=np.float64)
+        if method == "jackknife":
+            err[key] = float(math.sqrt((n - 1) / n * np.sum((r - r.mean()) ** 2)))
+        else:
+            err[key] = float(r.std(ddof=1))
+    return est, err
+
+
+# ----------------------------
+# On-disk stores (gauge configurations, propagators)
+# ----------------------------
+
+def _write_raw(base: str, ext: str, a: np.ndarray, header: Dict[str, Any]) -> None:
+    """Write a (C order, one leading-axis slice at a time) to base.ext and header to base.json.
+
+    Each file goes to a temporary name first and is renamed, the header last,
+    so an existing header always belongs to complete data.
+    """
+    header = {**header, "shape": list(a.shape), "dtype": a.dtype.str}
+    for e, write in ((ext, lambda f: [np.ascontiguousarray(a_t).tofile(f) for a_t in a]),
+                     ("json", lambda f: f.write(json.dumps(header).encode()))):
+        with open(f"{base}.{e}.tmp", "wb") as f:
+            write(f)
+        os.replace(f"{base}.{e}.tmp", f"{base}.{e}")
+
+
+def _open_raw(base: str, ext: str) -> Tuple[np.memmap, Dict[str, Any]]:
+    """The array written by _write_raw as a read-only memmap, and its header."""
+    with open(f"{base}.json", encoding="utf-8") as f:
+        header = json.load(f)
+    a = np.memmap(f"{base}.{ext}", dtype=np.dtype(header["dtype"]), mode="r", shape=tuple(header["shape"]))
+    return a, header
+
+
+class EnsembleStore:
+    """Numbered gauge configurations on disk, raw arrays plus JSON headers.
+
+    Configuration n (total sweep count, thermalization included) is the raw
+    array cfg_{n:06d}.u, re-read zero-copy with np.memmap, and the header
+    cfg_{n:06d}.json: shape, dtype, the caller's metadata (beta, L, T, seed,
+    ...), the generator state after sweep n, the plaquette and a SHA-256 of the
+    raw bytes. A header marks a complete configuration even if the job dies
+    mid-write (see _write_raw). compact=True stores two rows per link
+    (compress_links), two thirds of the size; load() returns what was stored,
+    full_links() rebuilds either form. save_measurement() keeps what was
+    measured on configuration n next to it (meas_{n:06d}.npz, header
+    meas_{n:06d}.json), so a resumed run does not measure it again.
+    """
+
+    def __init__(self, path: str, compact: bool = False) -> None:
+        self.path = path
+        self.compact = compact
+        os.makedirs(path, exist_ok=True)
+
+    def _base(self, n: int) -> str:
+        return os.path.join(self.path, f"cfg_{n:06d}")
+
+    def numbers(self) -> List[int]:
+        return sorted(int(f[4:-5]) for f in os.listdir(self.path)
+                      if f.startswith("cfg_") and f.endswith(".json"))
+
+    def latest(self, upto: int | None = None) -> int | None:
+        ns = [n for n in self.numbers() if upto is None or n <= upto]
+        return ns[-1] if ns else None
+
+    def save(self, n: int, U: np.ndarray, rng: np.random.Generator, **meta: Any) -> Dict[str, Any]:
+        plaq = float(plaquette_breakdown(U)[0])
+        U = compress_links(U) if self.compact else np.ascontiguousarray(U)
+        header = {**meta, "n": n, "plaquette": plaq,
+                  "checksum": hashlib.sha256(U).hexdigest(), "rng_state": rng.bit_generator.state}
+        _write_raw(self._base(n), "u", U, header)
+        return header
+
+    def load(self, n: int, verify: bool = True) -> Tuple[np.memmap, Dict[str, Any]]:
+        """Configuration n as a read-only memmap (as stored, see full_links) and its header."""
+        U, header = _open_raw(self._base(n), "u")
+        if verify and hashlib.sha256(U).hexdigest() != header["checksum"]:
+            raise ValueError(f"checksum mismatch in configuration {n} of {self.path}")
+        return U, header
+
+    def header(self, n: int) -> Dict[str, Any]:
+        """Header of configuration n, without touching its links."""
+        with open(f"{self._base(n)}.json", encoding="utf-8") as f:
+            return json.load(f)
+
+    def save_measurement(self, n: int, row: Dict[str, Any], **meta: Any) -> None:
+        """Store the measurements of configuration n; meta records how they were taken."""
+        base = os.path.join(self.path, f"meas_{n:06d}")
+        with open(f"{base}.npz.tmp", "wb") as f:
+            np.savez(f, **row)
+        with open(f"{base}.npz.tmp", "rb") as f:
+            checksum = hashlib.sha256(f.read()).hexdigest()
+        os.replace(f"{base}.npz.tmp", f"{base}.npz")
+        with open(f"{base}.json.tmp", "w", encoding="utf-8") as f:
+            json.dump({**meta, "n": n, "checksum": checksum}, f)
+        os.replace(f"{base}.json.tmp", f"{base}.json")
+
+    def load_measurement(self, n: int) -> Tuple[Dict[str, np.ndarray], Dict[str, Any]] | None:
+        """Measurements of configuration n and their header, or None if there are none."""
+        base = os.path.join(self.path, f"meas_{n:06d}")
+        if not os.path.exists(f"{base}.json"):
+            return None
+        with open(f"{base}.json", encoding="utf-8") as f:
+            header = json.load(f)
+        with open(f"{base}.npz", "rb") as f:
+            raw = f.read()
+        if hashlib.sha256(raw).hexdigest() != header["checksum"]:
+            raise ValueError(f"checksum mismatch in measurements {n} of {self.path}")
+        with np.load(io.BytesIO(raw)) as z:
+            return {k: z[k] for k in z.files}, header
+
+    def __iter__(self):
+        for n in self.numbers():
+            yield (n,) + self.load(n)
+
+
+class PropagatorStore:
+    """Propagators S[t,x,y,z, s, s0, c, c0] on disk as raw timeslice-major arrays.
+
+    prop_<key>.s holds S in C order, so every timeslice is one contiguous block;
+    prop_<key>.json holds shape, dtype and the caller's metadata (κ, source,
+    configuration, ...). load() maps a propagator read-only: stream_timeslices
+    contracts it a few timeslices at a time, and stored propagators can be
+    contracted again with new channels without solving.
+    """
+
+    def __init__(self, path: str) -> None:
+        self.path = path
+        os.makedirs(path, exist_ok=True)
+
+    def _base(self, key: str) -> str:
+        return os.path.join(self.path, f"prop_{key}")
+
+    def keys(self) -> List[str]:
+        return sorted(f[5:-5] for f in os.listdir(self.path) if f.startswith("prop_") and f.endswith(".json"))
+
+    def save(self, key: str, S: np.ndarray, **meta: Any) -> np.memmap:
+        """Write S under key and return it mapped back from disk."""
+        _write_raw(self._base(key), "s", S, {**meta, "key": key})
+        return self.load(key)[0]
+
+    def load(self, key: str) -> Tuple[np.memmap, Dict[str, Any]]:
+        return _open_raw(self._base(key), "s")
+
+
 # ----------------------------
 # End-to-end run
 # ----------------------------
 
-def run(beta: float, L: int, T: int, therm: int, sweeps: int, every: int, seed: int,
-        kappas: List[float], nf: int, c_flow: float, eps_flow: float) -> Dict[str, float]:
+FLOW_HISTORY_KEYS = ("E", "t2E", "tdEdt", "W", "Q")
+CHANNELS = ("pi", "rho", "p") + EXTRA_CHANNELS
 
-    rng = np.random.default_rng(seed)
+
+@dataclass(frozen=True)
+class MeasureOptions:
+    """How each configuration is measured: run()'s flow and hadron arguments.
+
+    One instance goes to every chain and is stored with each configuration's
+    measurements, which a resumed run reuses only for equal options.
+    """
+    kappas: List[float]
+    nf: int
+    c_flow: float
+    eps_flow: float
+    c_extra: List[float]
+    tol_flow: float | None
+    multishift: bool
+    solver: str
+    precision: str
+    n_deflate: int
+    momenta: List[Tuple[int, int, int]]
+    smear_steps: int
+    smear_kappa: float
+    smear_links: str
+    source: str
+    hits: int
+    dilution: str
+    compact_links: bool
+
+
+def _observables(kappas: List[float], momenta: List[Tuple[int, int, int]], c_extra: List[float],
+                 t_grid: np.ndarray) -> Callable[[Dict[str, np.ndarray]], Dict[str, float]]:
+    """run()'s derived outputs as a function of the means of its per-measurement series.
+
+    The series are aL, g2, alpha, Q2, extra_j (g2, alpha, aL at c_extra[j]),
+    hist_<k> (flow history on t_grid) and corr_<channel>_<i> per κ, with
+    corr_pi_p_<i> the pion at each of momenta. resample_errors evaluates the
+    returned function on every jackknife or bootstrap sample.
+    """
+    def observables(m: Dict[str, np.ndarray]) -> Dict[str, float]:
+        aLambda = float(m["aL"])
+
+        def ratio(x: float) -> float:
+            return float(x / aLambda) if (aLambda > 0 and math.isfinite(x)) else float('nan')
+
+        t0, w0 = flow_scales(t_grid, m["hist_t2E"], m["hist_W"])
+        out = {"g2_GF": float(m["g2"]), "alpha_msbar_at_mu": float(m["alpha"]), "aLambda_msbar": aLambda,
+               "t0": t0, "w0": w0, "Q2_flowed": float(m["Q2"])}
+        for j, c in enumerate(c_extra):
+            g2, alpha, aL = (float(v) for v in m[f"extra_{j}"])
+            out.update({f"g2_GF_c{c:g}": g2, f"alpha_msbar_at_mu_c{c:g}": alpha, f"aLambda_msbar_c{c:g}": aL})
+        for i in range(len(kappas)):
+            for ch in CHANNELS:
+                mass = float(mass_from_corr(m[f"corr_{ch}_{i}"]))
+                out[f"am_{ch}_{i}"] = mass
+                out[f"C_{ch}_{i}"] = ratio(mass)
+            for n, Cn in zip(momenta, m[f"corr_pi_p_{i}"]):
+                out[f"aE_pi_{i}_p{n[0]}{n[1]}{n[2]}"] = float(mass_from_corr(Cn))
+
+        # If two kappas: linear chiral extrapolation mp = m0 + b m_pi^2.
+        am_pi = [out[f"am_pi_{i}"] for i in range(len(kappas))]
+        am_p = [out[f"am_p_{i}"] for i in range(len(kappas))]
+        if len(kappas) >= 2 and all(math.isfinite(x) for x in am_pi[:2] + am_p[:2]):
+            x1, x2 = am_pi[0] ** 2, am_pi[1] ** 2
+            if abs(x2 - x1) > 1e-12:
+                m0 = (am_p[0] * x2 - am_p[1] * x1) / (x2 - x1)
+                out["am_p_chiral"] = float(m0)
+                out["C_p_chiral"] = float(m0 / aLambda)
+
+                # optional rho chiral extrapolation: m_rho = m0 + b m_pi^2
+                y1r, y2r = out["am_rho_0"], out["am_rho_1"]
+                m0r = (y1r * x2 - y2r * x1) / (x2 - x1)
+                out["am_rho_chiral"] = float(m0r)
+                out["C_rho_chiral"] = float(m0r / aLambda)
+        return out
+
+    return observables
+
+
+def _run_chain(ss: np.random.SeedSequence, store: str | EnsembleStore | None, prop_dir: str | None, *,
+               beta: float, L: int, T: int, therm: int, sweeps: int, every: int, update: str, n_or: int,
+               opts: MeasureOptions, t_grid: np.ndarray, bin_size: int, target_err: float | None,
+               target_key: str) -> Dict[str, Any]:
+    """One Markov chain of run(): thermalize, sweep and measure.
+
+    Gauge updates draw from default_rng(ss), stochastic sources from a stream
+    next to it. Returns the chain's per-measurement series (see _observables)
+    and sweep histories, which run() merges across chains. With target_err the
+    chain stops once the jackknife error of target_key, over bins of bin_size
+    measurements, is at most target_err relative to its value.
+    """
+    sweep = UPDATES[update]
+    if update == "heatbath":
+        sweep = functools.partial(sweep_heatbath, n_or=n_or)
+
+    rng = np.random.default_rng(ss)
+    # Noise for stochastic sources comes from its own stream, so the gauge chain
+    # does not depend on the source type.
+    noise_rng = np.random.default_rng(np.random.SeedSequence(ss.entropy, spawn_key=ss.spawn_key + (1,)))
     U = np.empty((T, L, L, L, 4, 3, 3), dtype=np.complex128)
     for t in range(T):
         for x1 in range(L):
@@ -495,99 +2299,296 @@ def run(beta: float, L: int, T: int, therm: int, sweeps: int, every: int, seed:
                     for mu in range(4):
                         U[t, x1, x2, x3, mu] = np.eye(3, dtype=np.complex128)
 
-    # Thermalize
-    for _ in range(therm):
-        sweep_metropolis(U, beta, rng, L, T)
-
-    # Accumulators
-    aL_list: List[float] = []
-    g2_list: List[float] = []
-    a_list: List[float] = []
+    # Resume from the last stored configuration of the same ensemble.
+    ens = EnsembleStore(store, compact=opts.compact_links) if isinstance(store, str) else store
+    pstore = PropagatorStore(prop_dir) if prop_dir else None
+    ens_meta = {"beta": float(beta), "L": L, "T": T, "seed": ss.entropy, "chain": list(ss.spawn_key),
+                "update": update, "n_or": n_or, "therm": therm, "every": every}
+    # Stored measurements are reused only if taken the same way (as read back from JSON).
+    meas_meta = json.loads(json.dumps({**asdict(opts), "t_grid": t_grid.tolist()}))
+    start = 0
+    history: List[Dict[str, Any]] = []
+    if ens is not None:
+        n = ens.latest(upto=therm + sweeps)
+        if n is not None:
+            V, header = ens.load(n)
+            bad = sorted(k for k, v in ens_meta.items() if header.get(k) != v)
+            if bad:
+                raise ValueError(f"{ens.path} holds a different ensemble ({', '.join(bad)})")
+            U[...] = full_links(V)
+            rng.bit_generator.state = header["rng_state"]
+            start = n
+            history = [ens.header(m) for m in ens.numbers() if therm < m <= n]
 
-    corr_pi = [np.zeros(T, dtype=np.float64) for _ in kappas]
-    corr_p = [np.zeros(T, dtype=np.float64) for _ in kappas]
-    corr_rho = [np.zeros(T, dtype=np.float64) for _ in kappas]
+    # Thermalize
+    for _ in range(start, therm):
+        sweep(U, beta, rng, L, T)
+    if opts.compact_links:
+        U[...] = reconstruct_links(compress_links(U))
+    if ens is not None and start < therm:
+        ens.save(therm, U, rng, acc=[], plaq=[], **ens_meta)
+
+    # Per-measurement series, binned and resampled by run(). Baryons need all
+    # colour components at one source point: NaN for other sources.
+    series: Dict[str, List[Any]] = {}
+    observables = _observables(opts.kappas, opts.momenta, opts.c_extra, t_grid)
+    acc_list: List[float] = [a for h in history for a in h["acc"]]
+    plaq_list: List[float] = [p for h in history for p in h["plaq"]]
+    n_saved = len(acc_list)
+    defl_bytes = 0
+    defl_residual = 0.0
     n_meas = 0
 
-    for sw in range(1, sweeps + 1):
-        sweep_metropolis(U, beta, rng, L, T)
-        if sw % every != 0:
-            continue
+    def measure(Um: np.ndarray, n_cfg: int) -> Dict[str, Any]:
+        """Flow observables and hadron correlators of configuration n_cfg (one series row)."""
+        nonlocal defl_bytes, defl_residual
+        # One flow trajectory serves c_flow, every extra c and the flow history.
+        hist = FlowHistory()
+        gf = gf_couplings_msbar_aLambda(Um, L, T, [opts.c_flow] + opts.c_extra, n_f=opts.nf,
+                                        eps_flow=opts.eps_flow, tol_flow=opts.tol_flow, observer=hist)
+        h = hist.as_arrays()
+        row: Dict[str, Any] = {f"hist_{k}": np.interp(t_grid, h["t"], h[k]) for k in FLOW_HISTORY_KEYS}
+        row["Q2"] = float(h["Q"][-1] ** 2)
+        row["g2"], row["alpha"], row["aL"] = gf[0]
+        for j, val in enumerate(gf[1:]):
+            row[f"extra_{j}"] = np.array(val)
+        for i in range(len(opts.kappas)):
+            for ch in CHANNELS:
+                baryon = ch in ("p", "p_neg")
+                row[f"corr_{ch}_{i}"] = np.full(T, np.nan if baryon and opts.source != "point" else 0.0)
+            row[f"corr_pi_p_{i}"] = np.zeros((len(opts.momenta), T))
+
+        # Hadron correlators at each κ on this gauge field; with smear_steps the
+        # sources and sinks are Wuppertal-smeared (smeared-smeared correlators).
+        sm = (QuarkSmearing(Um, opts.smear_kappa, opts.smear_steps, links=opts.smear_links)
+              if opts.smear_steps else None)
+        # Dirac-operator links, compact (two rows per link) with compact_links. The
+        # per-κ path shares the even-odd gathered links (even lattices only) and
+        # the low modes between every source and κ; multi-shift needs neither.
+        Ud = compress_links(Um) if opts.compact_links else Um
+        solve_kw: Dict[str, Any] = {}
+        defl = None
+        if not opts.multishift:
+            eo = False if L % 2 or T % 2 else EvenOddWilson(Ud)
+            defl = LowModeDeflation(Ud, max(opts.kappas), opts.n_deflate, eo=eo) if opts.n_deflate else None
+            solve_kw = {"method": opts.solver, "precision": opts.precision, "deflation": defl, "eo": eo}
+        # Propagators are produced lazily (one hit, and on the per-κ path one κ,
+        # at a time); with prop_dir each is written out and contracted from disk.
+        if opts.source != "point":
+            hit_props = (props_from_stochastic(Ud, opts.kappas, L, T, noise_rng, opts.source,
+                                               opts.dilution, t0=int(noise_rng.integers(T)),
+                                               multishift=opts.multishift, smearing=sm, **solve_kw)
+                         for _ in range(opts.hits))
+        elif opts.multishift:
+            hit_props = iter([props_from_point(Ud, opts.kappas, L, T, smearing=sm)])
+        else:
+            hit_props = iter([(prop_from_point(Ud, kappa, L, T, smearing=sm, **solve_kw)
+                               for kappa in opts.kappas)])
+        w = 1.0 / (opts.hits if opts.source != "point" else 1)
+        contract = functools.partial(hadron_corrs, momenta=opts.momenta, baryons=opts.source == "point")
+        for h, props in enumerate(hit_props):
+            for i, S in enumerate(props):
+                if sm is not None:
+                    S = sm.sink(S)
+                if pstore is not None:
+                    S = pstore.save(f"cfg{n_cfg:06d}_k{i}_h{h}", S, beta=float(beta), kappa=opts.kappas[i],
+                                    source=opts.source, smear_steps=opts.smear_steps)
+                    C = stream_timeslices(S, contract)
+                else:
+                    C = contract(S)
+                for ch, c in C.items():
+                    row[f"corr_{ch}_{i}"] += w * c
+        if defl is not None:
+            defl_bytes = max(defl_bytes, defl.nbytes)
+            defl_residual = max(defl_residual, defl.residual)
+        return row
 
-        g2, alpha, aL = gf_coupling_msbar_aLambda(U, L, T, c=c_flow, n_f=nf, eps_flow=eps_flow)
-        aL_list.append(aL)
-        g2_list.append(g2)
-        a_list.append(alpha)
-
-        # Hadron correlators at each κ on this gauge field
-        for i, kappa in enumerate(kappas):
-            S = prop_from_point(U, kappa, L, T)
-            corr_pi[i] += pion_corr(S, L, T)
-            corr_p[i] += proton_corr_direct(S, L, T)
-            corr_rho[i] += rho_corr(S, L, T)
+    for sw in range(1, sweeps + 1):
+        n_cfg = therm + sw
+        row, Um = None, U
+        if n_cfg <= start:
+            # Stored sweep: reuse its stored measurements, or measure the configuration from disk.
+            if sw % every != 0:
+                continue
+            stored = ens.load_measurement(n_cfg)
+            if stored is not None and all(stored[1].get(k) == v for k, v in meas_meta.items()):
+                row = stored[0]
+                noise_rng.bit_generator.state = stored[1]["noise_state"]
+            else:
+                Um = full_links(ens.load(n_cfg)[0])
+        else:
+            acc_list.append(sweep(U, beta, rng, L, T))
+            plaq_list.append(measure_plaquette(U, L, T))
+            if sw % every != 0:
+                continue
+            if opts.compact_links:
+                # continue from the links as they are stored, so a resumed chain is identical
+                U[...] = reconstruct_links(compress_links(U))
+            if ens is not None:
+                ens.save(n_cfg, U, rng, acc=acc_list[n_saved:], plaq=plaq_list[n_saved:], **ens_meta)
+                n_saved = len(acc_list)
+        if row is None:
+            row = measure(Um, n_cfg)
+            if ens is not None:
+                ens.save_measurement(n_cfg, row, noise_state=noise_rng.bit_generator.state, **meas_meta)
+        for k, v in row.items():
+            series.setdefault(k, []).append(v)
         n_meas += 1
 
-    if n_meas == 0:
-        raise RuntimeError("No measurements taken; increase sweeps or reduce every.")
+        if target_err is not None and n_meas // bin_size >= 4:
+            est, err = resample_errors({k: bin_series(v, bin_size) for k, v in series.items()}, observables)
+            if target_key not in est:
+                raise ValueError(f"unknown target observable: {target_key}")
+            if err[target_key] <= target_err * abs(est[target_key]):
+                break
+
+    return {"series": {k: np.array(v) for k, v in series.items()}, "acc": acc_list, "plaq": plaq_list,
+            "defl_bytes": defl_bytes, "defl_residual": defl_residual, "n_meas": n_meas, "start": start}
 
-    # Ensemble averages
-    aLambda = float(np.mean(aL_list))
-    g2_GF = float(np.mean(g2_list))
-    alpha_ms = float(np.mean(a_list))
 
-    out: Dict[str, float] = {
+def run(beta: float, L: int, T: int, therm: int, sweeps: int, every: int, seed: int,
+        kappas: List[float], nf: int, c_flow: float, eps_flow: float,
+        update: str | None = None, n_or: int = 4,
+        c_extra: List[float] | None = None, tol_flow: float | None = None,
+        flow_history_points: int = 21, multishift: bool = True, solver: str = "cg",
+        precision: str = "double", n_deflate: int = 0,
+        momenta: List[Tuple[int, int, int]] | None = None,
+        smear_steps: int = 0, smear_kappa: float = 0.25, smear_links: str = "ape",
+        source: str = "point", hits: int = 1, dilution: str = "spin",
+        store: str | EnsembleStore | None = None, chains: int = 1,
+        workers: int | None = None, prop_dir: str | None = None,
+        compact_links: bool = False, bin_size: int = 1, error_method: str = "jackknife",
+        n_boot: int = 200, target_err: float | None = None,
+        target_key: str = "aLambda_msbar") -> Dict[str, Any]:
+    """Generate a quenched ensemble at beta on an L^3 x T lattice and measure it.
+
+    After therm sweeps, every `every`-th of `sweeps` configurations gets one
+    gradient-flow trajectory (couplings, aΛ, t0/w0, topology) and hadron
+    correlators at each κ. The flow and hadron arguments are collected in a
+    MeasureOptions. store, chains/workers, prop_dir and compact_links set how
+    the ensemble is kept and generated; bin_size, error_method and n_boot set
+    the error analysis, and target_err/target_key stop early once reached.
+    Returns the flat dict described in the module docstring.
+    """
+    if update is None:
+        update = "scalar" if L % 2 or T % 2 else "checkerboard"
+    if update not in UPDATES:
+        raise ValueError(f"unknown gauge update: {update}")
+    if update in SUBLATTICE_UPDATES and (L % 2 or T % 2):
+        raise ValueError(f"the {update} update needs even L and T (got L={L}, T={T}); use update='scalar'")
+    if solver not in SOLVERS:
+        raise ValueError(f"unknown solver: {solver}")
+    if precision not in PRECISIONS:
+        raise ValueError(f"unknown precision: {precision}")
+    if multishift and (solver != "cg" or precision != "double"):
+        raise ValueError("solver and precision choose the per-κ solver path (multishift=False)")
+    if n_deflate and multishift:
+        raise ValueError("deflation needs the per-κ solver path (multishift=False)")
+    if n_deflate and (L % 2 or T % 2):
+        raise ValueError("deflation needs even-odd preconditioning, i.e. even L and T")
+    if source not in SOURCES:
+        raise ValueError(f"unknown source: {source}")
+    if chains < 1:
+        raise ValueError("chains must be at least 1")
+    if error_method not in ERROR_METHODS:
+        raise ValueError(f"unknown error method: {error_method}")
+    if bin_size < 1:
+        raise ValueError("bin_size must be at least 1")
+
+    c_extra = [float(c) for c in (c_extra or [])]
+    # Flow history on a common t grid (each trajectory interpolated onto it)
+    t_grid = np.linspace(0.0, max((c * L) ** 2 / 8.0 for c in [c_flow] + c_extra), flow_history_points)
+    momenta = [tuple(int(v) for v in n) for n in (momenta or [])]
+    opts = MeasureOptions(kappas=list(kappas), nf=nf, c_flow=c_flow, eps_flow=eps_flow, c_extra=c_extra,
+                          tol_flow=tol_flow, multishift=multishift, solver=solver, precision=precision,
+                          n_deflate=n_deflate, momenta=momenta, smear_steps=smear_steps,
+                          smear_kappa=smear_kappa, smear_links=smear_links, source=source, hits=hits,
+                          dilution=dilution, compact_links=compact_links)
+    chain_kw = dict(beta=beta, L=L, T=T, therm=therm, sweeps=sweeps, every=every, update=update, n_or=n_or,
+                    opts=opts, t_grid=t_grid, bin_size=bin_size, target_key=target_key,
+                    # each of N chains stops at sqrt(N) times the target of the pooled ensemble
+                    target_err=target_err * math.sqrt(chains) if target_err is not None else None)
+
+    # A single chain keeps the default_rng(seed) stream. N chains thermalize
+    # independently from SeedSequence(seed).spawn(N) in a process pool (one
+    # store and prop_dir subdirectory each); results are merged in chain
+    # order, so they do not depend on scheduling.
+    if chains == 1:
+        seqs, stores, prop_dirs = [np.random.SeedSequence(seed)], [store], [prop_dir]
+    else:
+        seqs = np.random.SeedSequence(seed).spawn(chains)
+        base = store.path if isinstance(store, EnsembleStore) else store
+        stores = [os.path.join(base, f"chain{i:02d}") if base else None for i in range(chains)]
+        prop_dirs = [os.path.join(prop_dir, f"chain{i:02d}") if prop_dir else None for i in range(chains)]
+    if chains == 1 or workers == 1:
+        res = [_run_chain(*args, **chain_kw) for args in zip(seqs, stores, prop_dirs)]
+    else:
+        with ProcessPoolExecutor(max_workers=workers or min(chains, os.cpu_count() or 1)) as pool:
+            res = list(pool.map(functools.partial(_run_chain, **chain_kw), seqs, stores, prop_dirs))
+
+    n_meas = sum(r["n_meas"] for r in res)
+    if n_meas == 0:
+        raise RuntimeError("No measurements taken; increase sweeps or reduce every.")
+    # Bins never straddle two chains.
+    bins = {k: np.concatenate([bin_series(r["series"][k], bin_size) for r in res if r["n_meas"]])
+            for k in next(r["series"] for r in res if r["n_meas"])}
+    n_bins = len(bins["aL"])
+    if n_bins == 0:
+        raise RuntimeError("No complete bins; reduce bin_size or take more measurements.")
+    est, err = resample_errors(bins, _observables(kappas, momenta, c_extra, t_grid), error_method,
+                               n_boot, np.random.default_rng(seed))
+    flow_hist = {k: bins[f"hist_{k}"].mean(axis=0) for k in FLOW_HISTORY_KEYS}
+
+    # Sweep histories: Γ-method per chain (chains are not one time series), pooled.
+    def pooled(stats: List[Tuple[float, float, float, float]], weights: List[int]) -> Tuple[float, ...]:
+        w = np.array(weights, dtype=np.float64) / sum(weights)
+        s = np.array(stats, dtype=np.float64)
+        return (float(w @ s[:, 0]), float(np.sqrt(w ** 2 @ s[:, 1] ** 2)),
+                float(w @ s[:, 2]), float(np.sqrt(w ** 2 @ s[:, 3] ** 2)))
+
+    n_sweeps = [len(r["plaq"]) for r in res]
+    plaq, plaq_err, tau_plaq, tau_plaq_err = pooled([gamma_method(r["plaq"]) for r in res], n_sweeps)
+    acc, acc_err, _, _ = pooled([gamma_method(r["acc"]) for r in res], n_sweeps)
+    chained = [r for r in res if r["n_meas"]]
+    _, _, tau_aL, tau_aL_err = pooled([gamma_method(r["series"]["aL"]) for r in chained],
+                                      [r["n_meas"] for r in chained])
+
+    out: Dict[str, Any] = {
         "beta": float(beta),
         "L": float(L),
         "T": float(T),
         "nf": float(nf),
         "c_flow": float(c_flow),
         "n_meas": float(n_meas),
-        "g2_GF": g2_GF,
-        "alpha_msbar_at_mu": alpha_ms,
+        "n_bins": float(n_bins),
+        "sweeps_done": float(sum(n_sweeps)),
         "mu_lat": float(1.0 / (c_flow * L)),
-        "aLambda_msbar": aLambda,
+        "acceptance": acc,
+        "acceptance_err": acc_err,
+        "plaquette": plaq,
+        "plaquette_err": plaq_err,
+        "tau_int_plaquette": tau_plaq,
+        "tau_int_plaquette_err": tau_plaq_err,
+        "tau_int_aLambda_msbar": tau_aL,
+        "tau_int_aLambda_msbar_err": tau_aL_err,
+        "flow_history": {"t": t_grid.tolist(), **{k: v.tolist() for k, v in flow_hist.items()}},
     }
-
-    am_pi: List[float] = []
-    am_p: List[float] = []
-    am_rho: List[float] = []
-
+    for k, v in est.items():
+        out[k] = v
+        out[f"{k}_err"] = err[k]
     for i, kappa in enumerate(kappas):
-        Cpi = corr_pi[i] / n_meas
-        Cp = corr_p[i] / n_meas
-        Cr = corr_rho[i] / n_meas
-        mpi = mass_from_corr(Cpi)
-        mp = mass_from_corr(Cp)
-        mr = mass_from_corr(Cr)
-        am_pi.append(float(mpi))
-        am_p.append(float(mp))
-        am_rho.append(float(mr))
         out[f"kappa_{i}"] = float(kappa)
-        out[f"am_pi_{i}"] = float(mpi)
-        out[f"am_p_{i}"] = float(mp)
-        out[f"am_rho_{i}"] = float(mr)
-        out[f"C_pi_{i}"] = float(mpi / aLambda) if (aLambda > 0 and math.isfinite(mpi)) else float('nan')
-        out[f"C_p_{i}"] = float(mp / aLambda) if (aLambda > 0 and math.isfinite(mp)) else float('nan')
-        out[f"C_rho_{i}"] = float(mr / aLambda) if (aLambda > 0 and math.isfinite(mr)) else float('nan')
-
-    # If two kappas: linear chiral extrapolation mp = m0 + b m_pi^2.
-    if len(kappas) >= 2 and all(math.isfinite(x) for x in am_pi[:2] + am_p[:2]):
-        x1, x2 = am_pi[0] ** 2, am_pi[1] ** 2
-        y1, y2 = am_p[0], am_p[1]
-        if abs(x2 - x1) > 1e-12:
-            m0 = (y1 * x2 - y2 * x1) / (x2 - x1)
-            out["am_p_chiral"] = float(m0)
-            out["C_p_chiral"] = float(m0 / aLambda)
-
-            # optional rho chiral extrapolation: m_rho = m0 + b m_pi^2
-            y1r, y2r = am_rho[0], am_rho[1]
-            m0r = (y1r * x2 - y2r * x1) / (x2 - x1)
-            out["am_rho_chiral"] = float(m0r)
-            out["C_rho_chiral"] = float(m0r / aLambda)
+    if chains > 1:
+        out["chains"] = float(chains)
+    if store is not None:
+        out["resumed_from"] = float(min(r["start"] for r in res))
+    if n_deflate:
+        out["deflation_MB"] = max(r["defl_bytes"] for r in res) / 2 ** 20
+        # worst low-mode residual (relative to the largest Ritz value) over all configurations
+        out["deflation_residual"] = max(r["defl_residual"] for r in res)
 
     return out
 
-
 def main() -> None:
     ap = argparse.ArgumentParser()
     ap.add_argument('--beta', type=float, default=5.7)
@@ -600,13 +2601,65 @@ def main() -> None:
     ap.add_argument('--kappas', type=str, default='0.120,0.125', help='comma-separated κ values')
     ap.add_argument('--nf', type=int, default=0, help='active flavours for MS-bar β (0=quenched)')
     ap.add_argument('--c', dest='c_flow', type=float, default=0.3, help='flow parameter in t=(cL)^2/8')
-    ap.add_argument('--eps', dest='eps_flow', type=float, default=0.01, help='flow integrator step size')
+    ap.add_argument('--eps', dest='eps_flow', type=float, default=0.01, help='flow integrator (RK3) step size')
+    ap.add_argument('--c-extra', type=str, default='', help='comma-separated extra c values from the same flow')
+    ap.add_argument('--flow-tol', dest='tol_flow', type=float, default=None,
+                    help='adaptive flow: embedded error tolerance (eps = initial step)')
+    ap.add_argument('--update', type=str, default=None, choices=sorted(UPDATES),
+                    help='gauge update (scalar = site-by-site reference sweep; '
+                         'default checkerboard, scalar on odd lattices)')
+    ap.add_argument('--n-or', dest='n_or', type=int, default=4,
+                    help='overrelaxation sweeps per heat-bath sweep (--update heatbath)')
+    ap.add_argument('--no-multishift', dest='multishift', action='store_false',
+                    help='solve each κ separately (with --solver) instead of one multi-shift solve')
+    ap.add_argument('--solver', type=str, default='cg', choices=sorted(SOLVERS),
+                    help='per-κ solver (even-odd preconditioned on even lattices); only with --no-multishift')
+    ap.add_argument('--precision', type=str, default='double', choices=PRECISIONS,
+                    help='mixed = complex64 inner solves with complex128 defect correction; '
+                         'only with --no-multishift')
+    ap.add_argument('--deflate', dest='n_deflate', type=int, default=0,
+                    help='low modes of the even-odd normal operator per configuration; only with --no-multishift')
+    ap.add_argument('--momenta', type=str, default='',
+                    help='pion energies at lattice momenta n (p=2πn/L), e.g. "1,0,0;1,1,0"')
+    ap.add_argument('--smear-steps', type=int, default=0,
+                    help='Wuppertal smearing steps for sources and sinks (0 = point-point)')
+    ap.add_argument('--smear-kappa', type=float, default=0.25, help='Wuppertal smearing κ_s')
+    ap.add_argument('--smear-links', type=str, default='ape', choices=sorted(LINK_SMEARINGS) + ['none'],
+                    help='link smearing under the quark smearing')
+    ap.add_argument('--source', type=str, default='point', choices=SOURCES,
+                    help='quark source: point, or wall / z2 / z4 noise on a random timeslice')
+    ap.add_argument('--hits', type=int, default=1, help='stochastic source hits per configuration')
+    ap.add_argument('--dilution', type=str, default='spin', choices=DILUTIONS,
+                    help='dilution of stochastic sources (spin: 4 solves, spin-colour: 12)')
+    ap.add_argument('--store', type=str, default=None,
+                    help='ensemble directory: checkpoint configurations there and resume from it')
+    ap.add_argument('--chains', type=int, default=1, help='independent Markov chains (process pool)')
+    ap.add_argument('--workers', type=int, default=None, help='worker processes for --chains (default: one per chain, at most one per CPU)')
+    ap.add_argument('--prop-dir', type=str, default=None,
+                    help='write propagators to memory-mapped files there and contract them per timeslice')
+    ap.add_argument('--compact-links', action='store_true',
+                    help='two-row (12-real) links in the Dirac operator and in --store checkpoints')
+    ap.add_argument('--bin-size', type=int, default=1, help='measurements per bin for the error analysis')
+    ap.add_argument('--error-method', type=str, default='jackknife', choices=ERROR_METHODS)
+    ap.add_argument('--target-err', type=float, default=None,
+                    help='stop early once the relative error of --target-key reaches this (--sweeps is the cap)')
+    ap.add_argument('--target-key', type=str, default='aLambda_msbar', help='observable for --target-err')
     ap.add_argument('--json', action='store_true')
     args = ap.parse_args()
 
     kappas = [float(x) for x in args.kappas.split(',') if x.strip()]
     out = run(args.beta, args.L, args.T, args.therm, args.sweeps, args.every, args.seed,
-              kappas=kappas, nf=args.nf, c_flow=args.c_flow, eps_flow=args.eps_flow)
+              kappas=kappas, nf=args.nf, c_flow=args.c_flow, eps_flow=args.eps_flow,
+              update=args.update, n_or=args.n_or,
+              c_extra=[float(x) for x in args.c_extra.split(',') if x.strip()], tol_flow=args.tol_flow,
+              multishift=args.multishift, solver=args.solver, precision=args.precision,
+              n_deflate=args.n_deflate,
+              momenta=[tuple(int(v) for v in n.split(',')) for n in args.momenta.split(';') if n.strip()],
+              smear_steps=args.smear_steps, smear_kappa=args.smear_kappa, smear_links=args.smear_links,
+              source=args.source, hits=args.hits, dilution=args.dilution, store=args.store,
+              chains=args.chains, workers=args.workers, prop_dir=args.prop_dir,
+              compact_links=args.compact_links, bin_size=args.bin_size, error_method=args.error_method,
+              target_err=args.target_err, target_key=args.target_key)
 
     if args.json:
         print(json.dumps(out, indent=2, sort_keys=True))
@@ -16,8 +16,8 @@ What is predicted
 - Full Stage-5 charged SM sector (masses + couplings) from OPH, given P.
 - Neutrinos: a Stage-6 minimal model that *uses log_dim_H* (dark-energy scale).
 - Optional hadrons: proton/pion ratios C_X := m_X/Λ^(3) from an internal collar
-  lattice computation (quenched gauge + Wilson valence, continuum 2-point O(a^2)
-  extrapolation). This is numerically expensive at high precision.
+  lattice computation (quenched gauge + Wilson valence, continuum O(a^2) least-squares
+  extrapolation over two or more β points, run concurrently). This is numerically expensive at high precision.
 
 Precision reality check
 -----------------------
@@ -37,8 +37,14 @@ from __future__ import annotations
 import argparse
 import json
 import math
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
 from dataclasses import dataclass
-from typing import Any, Dict, List, Optional, Tuple
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+import numpy as np
 
 import particle_masses_stage5 as st5  # charged SM (Stage-5)
 import oph_qcd  # 4-loop MSbar running
@@ -181,55 +187,123 @@ def richardson_c0(C1: float, a1: float, C2: float, a2: float) -> float:
     return num / den
 
 
-def _pick(res: Dict[str, Any], key_base: str) -> float:
-    # Prefer chiral-extrapolated values when present.
+def _pick(res: Dict[str, Any], key_base: str, suffix: str = "") -> float:
+    # Prefer chiral-extrapolated values when present; suffix="_err" gives the matching error.
     if f"{key_base}_chiral" in res and math.isfinite(float(res[f"{key_base}_chiral"])):
-        return float(res[f"{key_base}_chiral"])
-    return float(res.get(f"{key_base}_0", float("nan")))
+        return float(res.get(f"{key_base}_chiral{suffix}", float("nan")))
+    return float(res.get(f"{key_base}_0{suffix}", float("nan")))
+
 
+def continuum_fit(C: List[float], aL: List[float],
+                  err: Optional[List[float]] = None) -> Tuple[float, float, float]:
+    """Least-squares C = C0 + b (aΛ)^2 over all lattice spacings; returns (C0, b, error of C0).
 
-def compute_np_constants_internal(profile: str, overrides: Dict[str, Any]) -> Dict[str, Any]:
-    """Compute C_p and C_pi with a 2-point (β1,β2) continuum extrapolation."""
+    With two spacings this is richardson_c0. With per-point errors of C the
+    fit is weighted by 1/err^2 and the error of C0 comes from the fit
+    covariance (the error of aΛ enters through C = am/aΛ; the spread of the
+    abscissa itself is neglected). Without usable errors (missing, zero or
+    non-finite) the fit is unweighted and the error is NaN. Non-finite points
+    are dropped; NaN if fewer than two distinct spacings remain.
+    """
+    err = [float("nan")] * len(C) if err is None else err
+    pts = [(c, a * a, e) for c, a, e in zip(C, aL, err) if math.isfinite(c) and math.isfinite(a)]
+    if len({x for _, x, _ in pts}) < 2:
+        return float("nan"), float("nan"), float("nan")
+    A = np.array([[1.0, x] for _, x, _ in pts])
+    y = np.array([c for c, _, _ in pts])
+    e = np.array([e for _, _, e in pts])
+    if not np.all(np.isfinite(e) & (e > 0)):
+        (c0, slope), *_ = np.linalg.lstsq(A, y, rcond=None)
+        return float(c0), float(slope), float("nan")
+    Aw, yw = A / e[:, None], y / e
+    (c0, slope), *_ = np.linalg.lstsq(Aw, yw, rcond=None)
+    cov = np.linalg.inv(Aw.T @ Aw)
+    return float(c0), float(slope), float(math.sqrt(cov[0, 0]))
+
+
+def _run_beta_point(beta: float, seed: int, p: Dict[str, Any]) -> Dict[str, Any]:
+    store = p.get("store")
+    return lat.run(beta, p["L"], p["T"], p["therm"], p["sweeps"], p["every"], seed,
+                   kappas=list(p["kappas"]), nf=int(p["nf"]), c_flow=float(p["c"]), eps_flow=float(p["eps"]),
+                   update=str(p["update"]), n_or=int(p["n_or"]),
+                   store=os.path.join(store, f"beta{beta:g}") if store else None,
+                   chains=int(p.get("chains", 1)))
+
+
+def _progress(msg: str) -> None:
+    print(f"[hadrons] {msg}", file=sys.stderr, flush=True)
+
+
+def compute_np_constants_internal(profile: str, overrides: Dict[str, Any],
+                                  progress: Optional[Callable[[str], None]] = _progress) -> Dict[str, Any]:
+    """Compute C_p, C_pi and C_rho with an O(a^2) continuum extrapolation.
+
+    The β points (beta1, beta2, or a "betas" list) are independent lattice runs
+    with seeds seed, seed+1, ...; they run concurrently on a process pool of
+    "workers" processes (default one per point, 1 = in-process) and are then
+    fitted jointly with continuum_fit. progress(msg) reports each finished point.
+    """
     profiles = {
-        "demo":   dict(beta1=5.7, beta2=6.0, L=2, T=4, therm=1, sweeps=2, every=1, seed=0, kappas=[0.120, 0.125], nf=0, c=0.30, eps=0.05),
-        "quick":  dict(beta1=5.7, beta2=6.1, L=4, T=8, therm=10, sweeps=30, every=5, seed=0, kappas=[0.120, 0.125], nf=0, c=0.30, eps=0.01),
-        "serious":dict(beta1=5.8, beta2=6.2, L=6, T=12, therm=50, sweeps=200, every=10, seed=0, kappas=[0.120, 0.125], nf=0, c=0.30, eps=0.01),
+        "demo":   dict(beta1=5.7, beta2=6.0, L=2, T=4, therm=1, sweeps=2, every=1, seed=0, kappas=[0.120, 0.125], nf=0, c=0.30, eps=0.05, update="heatbath", n_or=4),
+        "quick":  dict(beta1=5.7, beta2=6.1, L=4, T=8, therm=10, sweeps=30, every=5, seed=0, kappas=[0.120, 0.125], nf=0, c=0.30, eps=0.01, update="heatbath", n_or=4),
+        "serious":dict(beta1=5.8, beta2=6.2, L=6, T=12, therm=50, sweeps=200, every=10, seed=0, kappas=[0.120, 0.125], nf=0, c=0.30, eps=0.01, update="heatbath", n_or=4),
     }
     if profile not in profiles:
         raise ValueError(f"unknown hadron profile: {profile}")
     p = {**profiles[profile], **overrides}
-
-    r1 = lat.run(p["beta1"], p["L"], p["T"], p["therm"], p["sweeps"], p["every"], p["seed"],
-                 kappas=list(p["kappas"]), nf=int(p["nf"]), c_flow=float(p["c"]), eps_flow=float(p["eps"]))
-    r2 = lat.run(p["beta2"], p["L"], p["T"], p["therm"], p["sweeps"], p["every"], p["seed"] + 1,
-                 kappas=list(p["kappas"]), nf=int(p["nf"]), c_flow=float(p["c"]), eps_flow=float(p["eps"]))
-
-    a1 = float(r1["aLambda_msbar"])
-    a2 = float(r2["aLambda_msbar"])
-
-    Cp1, Cp2 = _pick(r1, 'C_p'), _pick(r2, 'C_p')
-    Cpi1, Cpi2 = _pick(r1, 'C_pi'), _pick(r2, 'C_pi')
-    Crho1, Crho2 = _pick(r1, 'C_rho'), _pick(r2, 'C_rho')
-
-    C_cont = {
-        'C_p': richardson_c0(Cp1, a1, Cp2, a2) if all(map(math.isfinite, [a1, a2, Cp1, Cp2])) else float('nan'),
-        'C_pi': richardson_c0(Cpi1, a1, Cpi2, a2) if all(map(math.isfinite, [a1, a2, Cpi1, Cpi2])) else float('nan'),
-        'C_rho': richardson_c0(Crho1, a1, Crho2, a2) if all(map(math.isfinite, [a1, a2, Crho1, Crho2])) else float('nan'),
-    }
+    betas = [float(b) for b in p.get("betas") or [p["beta1"], p["beta2"]]]
+    seeds = [int(p["seed"]) + i for i in range(len(betas))]
+    workers = int(p.get("workers") or min(len(betas), os.cpu_count() or 1))
+
+    res: List[Dict[str, Any]] = [{} for _ in betas]
+    t_start = time.time()
+
+    def done(i: int, r: Dict[str, Any]) -> None:
+        res[i] = r
+        if progress is not None:
+            n = sum(1 for x in res if x)
+            progress(f"beta={betas[i]:g} done ({n}/{len(betas)}, {time.time() - t_start:.1f} s): "
+                     f"aLambda={float(r['aLambda_msbar']):.4g}")
+
+    if workers == 1:
+        for i, (beta, seed) in enumerate(zip(betas, seeds)):
+            done(i, _run_beta_point(beta, seed, p))
+    else:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            futs = {pool.submit(_run_beta_point, beta, seed, p): i for i, (beta, seed) in enumerate(zip(betas, seeds))}
+            for fut in as_completed(futs):
+                done(futs[fut], fut.result())
+
+    aL = [float(r["aLambda_msbar"]) for r in res]
+    points = [{'beta': r['beta'], 'aLambda_msbar': a,
+               'aLambda_msbar_err': float(r.get('aLambda_msbar_err', float('nan'))),
+               **{k: _pick(r, k) for k in ('C_p', 'C_pi', 'C_rho')},
+               **{f'{k}_err': _pick(r, k, '_err') for k in ('C_p', 'C_pi', 'C_rho')}}
+              for r, a in zip(res, aL)]
+    fits = {k: continuum_fit([pt[k] for pt in points], aL, [pt[f'{k}_err'] for pt in points])
+            for k in ('C_p', 'C_pi', 'C_rho')}
+    C_cont = {k: c0 for k, (c0, _, _) in fits.items()}
+    C_cont.update({f'{k}_err': e for k, (_, _, e) in fits.items()})
 
     C_out = {
         'C_p': float(C_cont['C_p']),
         'C_n': float(C_cont['C_p']),  # isospin-symmetric in this demo
         'C_pi': float(C_cont['C_pi']),
         'C_rho': float(C_cont['C_rho']),
+        'C_p_err': float(C_cont['C_p_err']),
+        'C_n_err': float(C_cont['C_p_err']),
+        'C_pi_err': float(C_cont['C_pi_err']),
+        'C_rho_err': float(C_cont['C_rho_err']),
     }
 
     meta = {
         "profile": profile,
         "params": {k: (float(v) if isinstance(v, (int, float)) else v) for k, v in p.items()},
-        'point1': {'beta': r1['beta'], 'aLambda_msbar': a1, 'C_p': Cp1, 'C_pi': Cpi1, 'C_rho': Crho1},
-        'point2': {'beta': r2['beta'], 'aLambda_msbar': a2, 'C_p': Cp2, 'C_pi': Cpi2, 'C_rho': Crho2},
+        "points": points,
+        'point1': points[0],
+        'point2': points[1] if len(points) > 1 else None,
         "C_continuum": C_cont,
+        "a2_slope": {k: b for k, (_, b, _) in fits.items()},
     }
     return {"C": C_out, "meta": meta}
 
@@ -376,9 +450,20 @@ def main() -> None:
     ap.add_argument("--hadron-kappas", type=str, default=None)
     ap.add_argument("--hadron-beta1", type=float, default=None)
     ap.add_argument("--hadron-beta2", type=float, default=None)
+    ap.add_argument("--hadron-betas", type=str, default=None,
+                    help="comma-separated β points for the continuum fit (replaces beta1/beta2)")
+    ap.add_argument("--hadron-workers", type=int, default=None,
+                    help="worker processes for the β points (default: one per point)")
     ap.add_argument("--hadron-c", type=float, default=None)
     ap.add_argument("--hadron-eps", type=float, default=None)
     ap.add_argument("--hadron-nf", type=int, default=None)
+    ap.add_argument("--hadron-update", type=str, default=None, choices=sorted(lat.UPDATES),
+                    help="gauge update algorithm for the hadron lattice")
+    ap.add_argument("--hadron-n-or", type=int, default=None, help="overrelaxation sweeps per heat-bath sweep")
+    ap.add_argument("--hadron-chains", type=int, default=None,
+                    help="independent Markov chains per β, run in a process pool")
+    ap.add_argument("--hadron-store", type=str, default=None,
+                    help="checkpoint gauge configurations under this directory and resume from it")
 
     ap.add_argument("--compare", action="store_true", help="print PDG comparison")
     ap.add_argument("--json", action="store_true", help="emit JSON")
@@ -410,11 +495,18 @@ def main() -> None:
         "c": args.hadron_c,
         "eps": args.hadron_eps,
         "nf": args.hadron_nf,
+        "update": args.hadron_update,
+        "n_or": args.hadron_n_or,
+        "store": args.hadron_store,
+        "chains": args.hadron_chains,
+        "workers": args.hadron_workers,
     }.items():
         if v is not None:
             had_over[k] = v
     if args.hadron_kappas:
         had_over["kappas"] = [float(x) for x in args.hadron_kappas.split(",") if x.strip()]
+    if args.hadron_betas:
+        had_over["betas"] = [float(x) for x in args.hadron_betas.split(",") if x.strip()]
 
     pred = build_predictions(
         P=float(args.P),
@@ -0,0 +1,695 @@
+#!/usr/bin/env python3
+"""Smoke tests for oph_lattice_su3_quenched_v5.py.
+
+These tests validate that the vectorized lattice kernels agree with the
+site-by-site reference implementations on tiny random configurations.
+
+Run:
+  python3 test_oph_lattice_su3_quenched_v5.py
+"""
+
+from __future__ import annotations
+
+import os
+import tempfile
+
+import numpy as np
+
+import oph_lattice_su3_quenched_v5 as lat
+
+
+def random_field(L: int, T: int, seed: int = 1) -> np.ndarray:
+    rng = np.random.default_rng(seed)
+    return lat.random_su3(rng, size=(T, L, L, L, 4))
+
+
+def assert_close(a: float, b: float, tol: float, name: str) -> None:
+    if not abs(a - b) <= tol:
+        raise AssertionError(f"{name}: {a} vs {b} (tol={tol})")
+
+
+def check_plaquette() -> None:
+    L, T = 2, 4
+    U = random_field(L, T)
+    avg, planes, slices = lat.plaquette_breakdown(U)
+    assert_close(avg, lat.measure_plaquette_scalar(U, L, T), 1e-12, "plaquette")
+    assert_close(float(planes.mean()), avg, 1e-12, "plaquette planes")
+    assert_close(float(slices.mean()), avg, 1e-12, "plaquette timeslices")
+    if planes.shape != (6,) or slices.shape != (T,):
+        raise AssertionError("unexpected plaquette breakdown shapes")
+
+    cold = np.broadcast_to(np.eye(3, dtype=np.complex128), U.shape).copy()
+    assert_close(lat.measure_plaquette(cold, L, T), 1.0, 1e-14, "cold plaquette")
+
+
+def assert_su3(U: np.ndarray, tol: float, name: str) -> None:
+    eye = np.eye(3)
+    dev = float(np.abs(lat.dagger(U) @ U - eye).max())
+    ddet = float(np.abs(np.linalg.det(U) - 1.0).max())
+    if dev > tol or ddet > tol:
+        raise AssertionError(f"{name} not in SU(3): unitarity {dev}, det {ddet}")
+
+
+def check_su3_project() -> None:
+    rng = np.random.default_rng(7)
+    for step in (0.0, 1e-6, 0.24, 1.0):
+        X = np.eye(3) + step * (rng.normal(size=(500, 3, 3)) + 1j * rng.normal(size=(500, 3, 3)))
+        P = lat.su3_project(X)
+        assert_su3(P, 1e-12, f"su3_project(step={step})")
+        assert_close(float(np.abs(P - lat.su3_project_eigh(X)).max()), 0.0, 1e-9, f"closed-form vs eigh polar (step={step})")
+    # single matrix and projection of an SU(3) element
+    U = lat.random_su3(rng)
+    if U.shape != (3, 3):
+        raise AssertionError("random_su3() should return a single 3x3 matrix")
+    assert_close(float(np.abs(lat.su3_project(U) - U).max()), 0.0, 1e-13, "projection of SU(3) element")
+
+
+def check_checkerboard() -> None:
+    L, T = 2, 4
+    U = random_field(L, T)
+    fwd, bwd = lat.neighbour_tables(L, T)
+    sites = list(np.ndindex(T, L, L, L))
+    for i in (0, 5, 17, 31):
+        for mu in range(4):
+            if sites[fwd[mu, i]] != lat.shift(sites[i], mu, +1, L, T) or sites[bwd[mu, i]] != lat.shift(sites[i], mu, -1, L, T):
+                raise AssertionError("neighbour tables disagree with shift()")
+    for mu in range(4):
+        S = lat.staple_field(U, mu)
+        for x in [(0, 0, 0, 0), (1, 1, 0, 1), (3, 0, 1, 1)]:
+            assert_close(float(np.abs(S[x] - lat.staple(U, x, mu, L, T)).max()), 0.0, 1e-12, "staple field")
+        for sub in lat.sublattices(L, T):
+            S_sub = lat.staple_field(U, mu, sub)
+            assert_close(float(np.abs(S_sub - S.reshape(-1, 3, 3)[sub]).max()), 0.0, 1e-13, "sublattice staples")
+
+    # Local action Re Tr[U S†] must be gauge invariant.
+    rng = np.random.default_rng(3)
+    G = lat.random_su3(rng, size=(T, L, L, L))
+    V = np.empty_like(U)
+    for mu in range(4):
+        V[..., mu, :, :] = G @ U[..., mu, :, :] @ lat.dagger(np.roll(G, -1, axis=mu))
+    for mu in range(4):
+        a = np.einsum('...ab,...ab->...', U[..., mu, :, :], lat.staple_field(U, mu).conj()).real
+        b = np.einsum('...ab,...ab->...', V[..., mu, :, :], lat.staple_field(V, mu).conj()).real
+        assert_close(float(np.abs(a - b).max()), 0.0, 1e-10, "gauge invariance of local action")
+
+    acc = lat.sweep_checkerboard(U, 5.7, rng, L, T)
+    if not 0.0 < acc < 1.0:
+        raise AssertionError(f"checkerboard acceptance out of range: {acc}")
+    assert_su3(U, 1e-12, "checkerboard links")
+
+    # Same Metropolis rule, so the same equilibrium plaquette as the scalar sweep.
+    plaq = {}
+    for update in ("checkerboard", "scalar"):
+        rng = np.random.default_rng(1)
+        U = np.broadcast_to(np.eye(3, dtype=np.complex128), (2, 2, 2, 2, 4, 3, 3)).copy()
+        p = []
+        for sw in range(120):
+            lat.UPDATES[update](U, 5.7, rng, 2, 2)
+            if sw >= 20:
+                p.append(lat.measure_plaquette(U, 2, 2))
+        plaq[update] = lat.gamma_method(p)[:2]
+    (a, da), (b, db) = plaq["checkerboard"], plaq["scalar"]
+    assert_close(a, b, 4 * np.hypot(da, db), "checkerboard vs scalar plaquette")
+
+    # Odd lattices: a clear error for the sublattice updates, scalar by default.
+    kw = dict(kappas=[0.12], nf=0, c_flow=0.3, eps_flow=0.05)
+    try:
+        lat.run(5.7, 3, 4, 0, 1, 1, 0, update="checkerboard", **kw)
+    except ValueError as e:
+        if "even L and T" not in str(e):
+            raise
+    else:
+        raise AssertionError("checkerboard update accepted an odd lattice")
+
+
+def check_heatbath() -> None:
+    L, T = 2, 4
+    U = random_field(L, T)
+    W = lat.dagger(lat.staple_field(U, 2)).reshape(-1, 3, 3)
+    U_sub = U[..., 2, :, :].reshape(-1, 3, 3).copy()
+    before = np.einsum('nab,nba->n', U_sub, W).real
+    lat._cm_update(U_sub, W, 5.7, None)
+    after = np.einsum('nab,nba->n', U_sub, W).real
+    assert_close(float(np.abs(after - before).max()), 0.0, 1e-12, "overrelaxation action change")
+    assert_su3(U_sub, 1e-12, "overrelaxed links")
+
+    rng = np.random.default_rng(5)
+    lat.sweep_heatbath(U, 5.7, rng, L, T, n_or=2)
+    assert_su3(U, 1e-12, "heat-bath links")
+
+    # Equilibrium at strong coupling: <P> = β/18 + β²/216 + O(β³) for SU(3).
+    beta = 1.0
+    U = np.broadcast_to(np.eye(3, dtype=np.complex128), (2, 2, 2, 2, 4, 3, 3)).copy()
+    p = []
+    for sw in range(160):
+        lat.sweep_heatbath(U, beta, rng, 2, 2, n_or=1)
+        if sw >= 10:
+            p.append(lat.measure_plaquette(U, 2, 2))
+    mean, err, _, _ = lat.gamma_method(p)
+    assert_close(mean, beta / 18 + beta ** 2 / 216, 4 * err, "strong-coupling heat-bath plaquette")
+
+    # A short plaquette history must not give τ_int below 1/2.
+    out = lat.run(5.7, 2, 4, 2, 6, 2, 0, kappas=[0.12], nf=0, c_flow=0.3, eps_flow=0.05)
+    if not out["tau_int_plaquette"] >= 0.5:
+        raise AssertionError(f"tau_int_plaquette={out['tau_int_plaquette']} below 1/2")
+
+
+def check_flow() -> None:
+    L, T = 2, 4
+    rng = np.random.default_rng(11)
+    U = np.broadcast_to(np.eye(3, dtype=np.complex128), (T, L, L, L, 4, 3, 3)).copy()
+    for _ in range(3):
+        lat.sweep_heatbath(U, 6.0, rng, L, T, n_or=1)
+    U0 = U.copy()
+
+    A = lat.traceless_antiherm(rng.normal(size=(10, 3, 3)) + 1j * rng.normal(size=(10, 3, 3)))
+    assert_su3(lat.su3_expm(0.3 * A), 1e-12, "su3_expm")
+
+    # Flow smooths the field and converges as O(eps^3).
+    pl0 = lat.measure_plaquette(U, L, T)
+    V_coarse = U
+    for _ in range(2):
+        V_coarse = lat.flow_step(V_coarse, 0.1, L, T)
+    V_fine = U
+    for _ in range(8):
+        V_fine = lat.flow_step(V_fine, 0.025, L, T)
+    if not np.array_equal(U, U0):
+        raise AssertionError("flow_step modified its input")
+    assert_su3(V_fine, 1e-12, "flowed links")
+    pl_c, pl_f = lat.measure_plaquette(V_coarse, L, T), lat.measure_plaquette(V_fine, L, T)
+    if not pl_f > pl0:
+        raise AssertionError(f"flow did not smooth the field: {pl0} -> {pl_f}")
+    assert_close(pl_c, pl_f, 1e-3, "RK3 flow step-size dependence")
+
+    # Adaptive flow with dense output matches the fixed-step trajectory.
+    ts = [0.05, 0.1, 0.2]
+    ref = lat.flow_trajectory(U, L, T, ts, eps=0.0125)
+    ada = lat.flow_trajectory(U, L, T, ts, eps=0.01, tol=1e-4)
+    assert_close(float(np.abs(ada["t2E"] - ref["t2E"]).max()), 0.0, 1e-5, "adaptive flow t^2 E")
+    if not int(ada["n_steps"]) < int(ref["n_steps"]):
+        raise AssertionError("adaptive flow did not take larger steps")
+    multi = lat.gf_couplings_msbar_aLambda(U, L, T, [0.3, 0.4], n_f=0, eps_flow=0.05)
+    single = lat.gf_coupling_msbar_aLambda(U, L, T, 0.4, n_f=0, eps_flow=0.05)
+    assert_close(multi[1][0], single[0], 1e-3, "multi-c GF coupling")
+
+
+def check_clover() -> None:
+    L, T = 4, 4
+    rng = np.random.default_rng(13)
+    U = np.broadcast_to(np.eye(3, dtype=np.complex128), (T, L, L, L, 4, 3, 3)).copy()
+    for _ in range(3):
+        lat.sweep_heatbath(U, 6.0, rng, L, T, n_or=1)
+
+    # Gauge invariance of E and Q
+    G = lat.random_su3(rng, size=(T, L, L, L))
+    V = np.empty_like(U)
+    for mu in range(4):
+        V[..., mu, :, :] = G @ U[..., mu, :, :] @ lat.dagger(np.roll(G, -1, axis=mu))
+    E1, Q1 = lat.clover_energy_density(U)
+    E2, Q2 = lat.clover_energy_density(V)
+    assert_close(E1, E2, 1e-10, "clover E gauge invariance")
+    assert_close(Q1, Q2, 1e-10, "topological charge gauge invariance")
+
+    # Observer hook along the flow; clover and plaquette E agree for smooth fields.
+    hist = lat.FlowHistory()
+    traj = lat.flow_trajectory(U, L, T, [0.5, 1.0], eps=0.05, observer=hist)
+    h = hist.as_arrays()
+    if len(h["t"]) != int(traj["n_steps"]) + 1 or h["t"][-1] != 1.0:
+        raise AssertionError("flow observer not called once per step")
+    if not np.all(np.diff(h["E"]) < 0) or not np.all(h["tdEdt"][1:] < 0):
+        raise AssertionError("clover E(t) not decreasing along the flow")
+    assert_close(h["t2E"][-1], h["E"][-1], 1e-15, "t^2 E at t=1")
+
+    # Constant abelian fluxes f (12 plane) and g (03 plane) along H=diag(1,-1,0):
+    # E_clover = 2 (sin^2 f + sin^2 g), Q = V sin f sin g / (2π^2) ≈ 2.
+    L, T = 6, 4
+    f, g = 2 * np.pi / L ** 2, 2 * np.pi / (T * L)
+    H = np.array([1.0, -1.0, 0.0])
+    U = np.broadcast_to(np.eye(3, dtype=np.complex128), (T, L, L, L, 4, 3, 3)).copy()
+    for x1 in range(L):
+        for x2 in range(L):
+            U[:, x1, x2, :, 2] = np.diag(np.exp(1j * f * x1 * H))
+            if x1 == L - 1:
+                U[:, x1, x2, :, 1] = np.diag(np.exp(-1j * f * L * x2 * H))
+    for x0 in range(T):
+        for x3 in range(L):
+            U[x0, :, :, x3, 3] = np.diag(np.exp(1j * g * x0 * H))
+            if x0 == T - 1:
+                U[x0, :, :, x3, 0] = np.diag(np.exp(-1j * g * T * x3 * H))
+    E, Q = lat.clover_energy_density(U)
+    assert_close(E, 2 * (np.sin(f) ** 2 + np.sin(g) ** 2), 1e-12, "clover E of constant flux")
+    assert_close(Q, T * L ** 3 * np.sin(f) * np.sin(g) / (2 * np.pi ** 2), 1e-10, "Q of constant flux")
+
+
+def check_solvers() -> None:
+    L, T = 2, 4
+    rng = np.random.default_rng(17)
+    U = np.broadcast_to(np.eye(3, dtype=np.complex128), (T, L, L, L, 4, 3, 3)).copy()
+    for _ in range(3):
+        lat.sweep_heatbath(U, 5.7, rng, L, T, n_or=1)
+    src = rng.normal(size=(T, L, L, L, 4, 3, 3)) + 1j * rng.normal(size=(T, L, L, L, 4, 3, 3))
+
+    # Spin-projected hopping term against the dense (1 ∓ γ_μ) form.
+    ref = np.zeros_like(src[..., 0])
+    for mu, ((Rm, Pm), (Rp, Pp)) in enumerate(lat.SPIN_PROJ):
+        g = lat.GAMMA[mu]
+        assert_close(float(np.abs(Rm @ Pm - (np.eye(4) - g)).max() + np.abs(Rp @ Pp - (np.eye(4) + g)).max()), 0.0, 1e-14, "spin projector factorisation")
+        U_b = lat.dagger(np.roll(U[..., mu, :, :], 1, axis=mu))
+        ref += np.einsum('ij,...ab,...jb->...ia', np.eye(4) - g, U[..., mu, :, :], np.roll(src[..., 0], -1, axis=mu))
+        ref += np.einsum('ij,...ab,...jb->...ia', np.eye(4) + g, U_b, np.roll(src[..., 0], 1, axis=mu))
+    assert_close(float(np.abs(lat.apply_hop(U, src[..., 0]) - ref).max()), 0.0, 1e-13, "spin-projected hopping term")
+    DX = lat.apply_D(U, src, 0.12, L, T)
+    x_ref = np.stack([lat.cg_solve(U, 0.12, src[..., k], L, T) for k in range(3)], axis=-1)
+    for k in range(3):
+        assert_close(float(np.abs(DX[..., k] - lat.apply_D(U, src[..., k], 0.12, L, T)).max()), 0.0, 1e-13, "batched apply_D")
+    S_blk = lat.prop_from_point(U, 0.12, L, T, block=True, eo=False)
+    S_eo = lat.prop_from_point(U, 0.12, L, T)
+    S_ref = lat.prop_from_point(U, 0.12, L, T, block=False)
+    assert_close(float(np.abs(S_blk - S_ref).max()), 0.0, 1e-9, "block CG propagator")
+    assert_close(float(np.abs(S_eo - S_ref).max()), 0.0, 1e-9, "even-odd propagator")
+    eo = lat.EvenOddWilson(U)
+    for method in lat.SOLVERS:
+        for pre in (eo, False):
+            res = lat.solve_dirac(U, 0.12, src, L, T, method, eo=pre)
+            if not res.converged or res.residual > 1e-8 or res.iterations <= 0:
+                raise AssertionError(f"{method} (eo={pre is eo}): {res}")
+            assert_close(float(np.abs(res.x - x_ref).max()), 0.0, 1e-8, f"{method} solution")
+            mixed = lat.solve_dirac(U, 0.12, src, L, T, method, eo=pre, precision="mixed")
+            if not mixed.converged or mixed.residual > 1e-10 or mixed.x.dtype != np.complex128:
+                raise AssertionError(f"mixed-precision {method} (eo={pre is eo}): {mixed}")
+    # The complex64 operator for mixed precision is built once per EvenOddWilson.
+    lo = eo.single()
+    if lo is not eo.single() or lo.dtype != np.complex64 or 2 * lo.nbytes != eo.nbytes:
+        raise AssertionError("single-precision even-odd operator not cached")
+    half = eo.split(src)[1]
+    assert_close(float(np.abs(lo.hop(half.astype(np.complex64), 0) - eo.hop(half, 0)).max()), 0.0, 1e-5,
+                 "single-precision hop")
+
+    # tol is relative for every method: a tiny source is solved just as accurately.
+    for method in lat.SOLVERS:
+        res = lat.solve_dirac(U, 0.12, 1e-6 * src, L, T, method)
+        if not res.converged or res.residual > 1e-8:
+            raise AssertionError(f"{method} on a rescaled source: {res}")
+    # Lanczos low modes of M†M and the deflated starting guess
+    defl = lat.LowModeDeflation(U, 0.12, 4, eo=eo)
+    if not defl.converged or defl.residual > 1e-6:
+        raise AssertionError(f"low modes not converged (residual {defl.residual})")
+    d = np.linspace(0.01, 1.0, 200)
+    *_, rel = lat.lowest_eigenpairs(lambda x: d[:, None] * x, (200,), 4, tol=1e-12, max_restarts=1)
+    if not rel > 1e-12:
+        raise AssertionError("unconverged low modes not reported")
+    out = lat.run(5.7, L, T, 0, 1, 1, 0, kappas=[0.12], nf=0, c_flow=0.3, eps_flow=0.05,
+                  multishift=False, n_deflate=4)
+    if not 0.0 <= out["deflation_residual"] <= 1e-6 or out["deflation_MB"] <= 0:
+        raise AssertionError(f"deflation diagnostics: {out['deflation_residual']}, {out['deflation_MB']}")
+    V = defl.V.reshape(-1, 4)
+    assert_close(float(np.abs(V.conj().T @ V - np.eye(4)).max()), 0.0, 1e-10, "orthonormal low modes")
+    MV = eo.schur(defl.V, 0.12)
+    MhMV = lat._g5_block(eo.schur(lat._g5_block(MV), 0.12))
+    assert_close(float(np.abs(MhMV - defl.V * defl.evals).max()), 0.0, 1e-5, "low-mode eigen-equation")
+    b_e = eo.split(src)[0]
+    x0 = defl.guess(0.12, b_e)
+    c = np.linalg.lstsq(MV.reshape(-1, 4), b_e.reshape(-1, 3), rcond=None)[0]
+    assert_close(float(np.abs(x0.reshape(-1, 3) - V @ c).max()), 0.0, 1e-10, "deflated starting guess")
+    res = lat.solve_dirac(U, 0.12, src, L, T, "cg", deflation=defl)
+    assert_close(float(np.abs(res.x - x_ref).max()), 0.0, 1e-8, "deflated solution")
+    if defl.nbytes <= defl.V.nbytes:
+        raise AssertionError("deflation memory does not include the cached factors")
+
+    if lat.solve_dirac(U, 0.12, src, L, T, "gcr", maxiter=2).converged:
+        raise AssertionError("solve_dirac reported convergence after 2 iterations")
+    try:
+        lat.prop_from_point(U, 0.12, L, T, maxiter=2)
+    except RuntimeError:
+        pass
+    else:
+        raise AssertionError("unconverged propagator solve was not surfaced")
+    assert_close(float(np.abs(eo.join(*eo.split(src)) - src).max()), 0.0, 0.0, "even-odd split/join")
+
+    # Odd lattices have no checkerboard: the default solve falls back to the full lattice.
+    U3 = random_field(3, 2, seed=4)
+    S3 = lat.prop_from_point(U3, 0.12, 3, 2)
+    assert_close(float(np.abs(S3 - lat.prop_from_point(U3, 0.12, 3, 2, eo=False)).max()), 0.0, 0.0,
+                 "odd-lattice propagator")
+    try:
+        lat.EvenOddWilson(U3)
+    except ValueError as e:
+        if "even-odd preconditioning" not in str(e):
+            raise
+    else:
+        raise AssertionError("even-odd operator accepted an odd lattice")
+
+    # run() rejects unknown solvers and per-κ solver options on the multi-shift path.
+    kw = dict(kappas=[0.12], nf=0, c_flow=0.3, eps_flow=0.05)
+    for bad in (dict(solver="nope", multishift=False), dict(precision="bogus", multishift=False),
+                dict(solver="bicgstab"), dict(precision="mixed")):
+        try:
+            lat.run(5.7, L, T, 0, 1, 1, 0, **kw, **bad)
+        except ValueError:
+            pass
+        else:
+            raise AssertionError(f"run() accepted {bad}")
+
+    # Multi-shift BiCGStab: every κ from one Krylov space, point sources included.
+    kappas = [0.11, 0.12, 0.125]
+    props = lat.props_from_point(U, kappas, L, T)
+    assert_close(float(np.abs(props[1] - S_ref).max()), 0.0, 1e-9, "multi-shift propagator")
+    for kappa, x in zip(kappas, lat.bicgstab_multishift(U, kappas, src, L, T)):
+        res = float(np.abs(lat.apply_D(U, x, kappa, L, T) - src).max())
+        assert_close(res, 0.0, 1e-8, f"multi-shift residual (kappa={kappa})")
+
+
+def check_contractions() -> None:
+    L, T = 2, 4
+    rng = np.random.default_rng(19)
+    S = rng.normal(size=(T, L, L, L, 4, 4, 3, 3)) + 1j * rng.normal(size=(T, L, L, L, 4, 4, 3, 3))
+    assert_close(float(np.abs(lat.rho_corr(S, L, T) - lat.rho_corr_scalar(S, L, T)).max()), 0.0, 1e-11, "rho contraction")
+    ref = lat.proton_corr_direct_scalar(S, L, T)
+    assert_close(float(np.abs(lat.proton_corr_direct(S, L, T) - ref).max()), 0.0, 1e-9, "proton contraction")
+    mesons = lat.meson_corrs(S)
+    assert_close(float(np.abs(mesons["pi"] - lat.pion_corr(S, L, T)).max()), 0.0, 1e-11, "pion from meson_corr")
+    # Every meson channel against the explicit trace, site by site.
+    Q = S.reshape(T, -1, 4, 4, 3, 3)
+    for name, gammas in lat.MESON_CHANNELS.items():
+        ref = np.zeros(T)
+        for G in gammas:
+            Gbar = lat.GAMMA[0] @ G.conj().T @ lat.GAMMA[0]
+            for t in range(T):
+                for x in range(Q.shape[1]):
+                    for a in range(3):
+                        for b in range(3):
+                            Sab = Q[t, x, :, :, a, b]
+                            ref[t] -= np.trace(G @ Sab @ Gbar @ lat.G5 @ Sab.conj().T @ lat.G5).real
+        assert_close(float(np.abs(mesons[name] - ref / len(gammas)).max()), 0.0, 1e-10, f"{name} contraction")
+    # All 16 Γ pairs and momenta in one pass.
+    moms = ((0, 0, 0), (1, 0, 0), (0, 1, 1))
+    C = lat.meson_engine(S, momenta=moms)
+    if C.shape != (16, 16, len(moms), T):
+        raise AssertionError(f"meson_engine shape {C.shape}")
+    g5 = lat.DIRAC_NAMES.index("g5")
+    assert_close(float(np.abs(C[g5, g5, 0] - mesons["pi"]).max()), 0.0, 1e-10, "engine pion")
+    ph = lat.momentum_phases(L, moms)
+    site = np.zeros((T, L ** 3), dtype=np.complex128)
+    G, Gbar = lat.DIRAC_BASIS[3], lat.GAMMA[0] @ lat.DIRAC_BASIS[7].conj().T @ lat.GAMMA[0]
+    for t in range(T):
+        for x in range(L ** 3):
+            for a in range(3):
+                for b in range(3):
+                    Sab = Q[t, x, :, :, a, b]
+                    site[t, x] -= np.trace(G @ Sab @ Gbar @ lat.G5 @ Sab.conj().T @ lat.G5)
+    assert_close(float(np.abs(C[3, 7] - np.einsum('px,tx->pt', ph, site)).max()), 0.0, 1e-10, "momentum-projected Γ pair")
+
+    # Negative parity: the scalar reference with P- in place of P+.
+    p_neg = lat.nucleon_corrs(S)[1]
+    pplus = lat.PPLUS
+    try:
+        lat.PPLUS = lat.PMINUS
+        ref = lat.proton_corr_direct_scalar(S, L, T)
+    finally:
+        lat.PPLUS = pplus
+    assert_close(float(np.abs(p_neg - ref).max()), 0.0, 1e-9, "negative-parity nucleon contraction")
+
+
+def check_smearing() -> None:
+    L, T = 4, 4
+    rng = np.random.default_rng(23)
+    U = np.broadcast_to(np.eye(3, dtype=np.complex128), (T, L, L, L, 4, 3, 3)).copy()
+    for _ in range(3):
+        lat.sweep_heatbath(U, 5.7, rng, L, T, n_or=1)
+
+    def spatial(V: np.ndarray) -> float:
+        return float(lat.plaquette_breakdown(V)[1][3:].mean())  # 12, 13, 23 planes
+
+    for name, smear in lat.LINK_SMEARINGS.items():
+        V = smear(U, n_steps=3)
+        assert_su3(V, 1e-12, f"{name}-smeared links")
+        if not np.array_equal(V[..., 0, :, :], U[..., 0, :, :]) or not spatial(V) > spatial(U):
+            raise AssertionError(f"{name} smearing should smooth spatial links only")
+
+    # Wuppertal smearing is gauge covariant and keeps the source on its timeslice.
+    sm = lat.QuarkSmearing(U, n_steps=5, links="none")
+    G = lat.random_su3(rng, size=(T, L, L, L))
+    V = np.empty_like(U)
+    for mu in range(4):
+        V[..., mu, :, :] = G @ U[..., mu, :, :] @ lat.dagger(np.roll(G, -1, axis=mu))
+    psi = rng.normal(size=(T, L, L, L, 4, 3)) + 1j * rng.normal(size=(T, L, L, L, 4, 3))
+    lhs = lat.QuarkSmearing(V, n_steps=5, links="none").apply(G[..., None, :, :] @ psi[..., None])[..., 0]
+    rhs = (G[..., None, :, :] @ sm.apply(psi)[..., None])[..., 0]
+    assert_close(float(np.abs(lhs - rhs).max()), 0.0, 1e-12, "Wuppertal gauge covariance")
+    src = sm.apply(lat._point_sources(L, T))
+    if np.abs(src[1:]).max() != 0.0 or np.abs(src[0, 1]).max() == 0.0:
+        raise AssertionError("smeared source should spread within its timeslice only")
+
+    # Smeared source and sink from one solve; solvers agree on the smeared source.
+    sm = lat.QuarkSmearing(U, n_steps=4)
+    S_sp = lat.prop_from_point(U, 0.12, L, T, smearing=sm)
+    S_ms = lat.props_from_point(U, [0.12], L, T, smearing=sm)[0]
+    assert_close(float(np.abs(S_sp - S_ms).max()), 0.0, 1e-8, "smeared-source propagator")
+    S_ss = sm.sink(S_sp)
+    if not np.all(lat.pion_corr(S_ss, L, T) > 0):
+        raise AssertionError("smeared-smeared pion correlator not positive")
+
+
+def check_sources() -> None:
+    L, T, kappa, t0 = 2, 4, 0.12, 1
+    U = random_field(L, T, seed=29)
+
+    # A diluted noise source solves to the η-weighted sum of point propagators.
+    P = lat.props_from_stochastic(U, [kappa], L, T, np.random.default_rng(3), "z4", "spin-colour", t0=t0)[0]
+    eta = lat.stochastic_sources(L, T, np.random.default_rng(3), "z4", "spin-colour", t0)[t0, ..., 0, 0, 0]
+    ref = np.zeros_like(P)
+    for x in np.ndindex(L, L, L):
+        ref += eta[x] * lat.prop_from_point(U, kappa, L, T, x0=(t0,) + x)
+    ref = np.roll(ref, -t0, axis=0) / L ** 1.5
+    assert_close(float(np.abs(P - ref).max()), 0.0, 1e-8, "stochastic propagator")
+    Q = lat.props_from_stochastic(U, [kappa], L, T, np.random.default_rng(3), "z2", multishift=False,
+                                  method="bicgstab")[0]
+    if Q.shape != (T, L, L, L, 4, 4, 3, 1):
+        raise AssertionError(f"spin-diluted propagator shape {Q.shape}")
+    sm = lat.QuarkSmearing(U, n_steps=2)
+    assert_close(float(np.abs(sm.sink(P)[..., 1:2] - sm.sink(P[..., 1:2])).max()), 0.0, 1e-12,
+                 "sink smearing of a colour-diluted propagator")
+
+    # Averaged over hits, the noise pion approaches the source-averaged point pion.
+    C_pt = np.mean([lat.pion_corr(lat.prop_from_point(U, kappa, L, T, x0=(0,) + x), L, T)
+                    for x in np.ndindex(L, L, L)], axis=0)
+    rng = np.random.default_rng(5)
+    C_z2 = np.mean([lat.pion_corr(lat.props_from_stochastic(U, [kappa], L, T, rng, "z2")[0], L, T)
+                    for _ in range(16)], axis=0)
+    if not np.all(np.abs(C_z2 / C_pt - 1.0) < 0.2):
+        raise AssertionError(f"noise pion {C_z2} far from point pion {C_pt}")
+
+
+def check_store() -> None:
+    L, T = 2, 4
+    U = random_field(L, T, seed=31)
+    rng = np.random.default_rng(7)
+    kw = dict(kappas=[0.12], nf=0, c_flow=0.3, eps_flow=0.05)
+    with tempfile.TemporaryDirectory() as tmp:
+        ens = lat.EnsembleStore(os.path.join(tmp, "ens"))
+        ens.save(3, U, rng, beta=5.7)
+        V, header = ens.load(3)
+        if not isinstance(V, np.memmap) or not np.array_equal(V, U) or V.flags.writeable:
+            raise AssertionError("stored configuration should come back as a read-only memmap")
+        assert_close(header["plaquette"], lat.measure_plaquette(U, L, T), 1e-14, "stored plaquette")
+        replay = np.random.default_rng(0)
+        replay.bit_generator.state = header["rng_state"]
+        if replay.random() != rng.random():
+            raise AssertionError("stored generator state does not replay")
+        with open(ens._base(3) + ".u", "r+b") as f:
+            f.write(b"\x01")
+        try:
+            ens.load(3)
+        except ValueError:
+            pass
+        else:
+            raise AssertionError("corrupted configuration not detected")
+
+        # A run resumed from the store (also after losing its last checkpoint)
+        # reproduces the uninterrupted run.
+        ref = lat.run(5.7, L, T, 2, 6, 2, 0, **kw)
+        path = os.path.join(tmp, "run")
+        lat.run(5.7, L, T, 2, 4, 2, 0, store=path, **kw)
+        res = lat.run(5.7, L, T, 2, 6, 2, 0, store=path, **kw)
+        os.remove(os.path.join(path, "cfg_000008.json"))
+        res2 = lat.run(5.7, L, T, 2, 6, 2, 0, store=path, **kw)
+        for r in (res, res2):
+            for k in ("plaquette", "acceptance", "aLambda_msbar", "am_pi_0", "am_rho_0"):
+                assert_close(r[k], ref[k], 1e-12, f"resumed {k}")
+        if (res["resumed_from"], res2["resumed_from"]) != (6.0, 6.0):
+            raise AssertionError("run did not resume from the last checkpoint")
+
+        # Stored measurements are reused (configuration 4 is not read again), and
+        # a resumed stochastic-source run continues the same noise stream.
+        os.remove(os.path.join(path, "cfg_000004.u"))
+        res3 = lat.run(5.7, L, T, 2, 6, 2, 0, store=path, **kw)
+        assert_close(res3["am_pi_0"], ref["am_pi_0"], 1e-12, "resumed from stored measurements")
+        ref = lat.run(5.7, L, T, 2, 6, 2, 0, source="z2", **kw)
+        noisy = os.path.join(tmp, "noisy")
+        lat.run(5.7, L, T, 2, 4, 2, 0, store=noisy, source="z2", **kw)
+        res = lat.run(5.7, L, T, 2, 6, 2, 0, store=noisy, source="z2", **kw)
+        assert_close(res["am_pi_0"], ref["am_pi_0"], 1e-12, "resumed stochastic-source run")
+        with open(os.path.join(noisy, "meas_000004.npz"), "r+b") as f:
+            f.write(b"\x01")
+        try:
+            lat.run(5.7, L, T, 2, 6, 2, 0, store=noisy, source="z2", **kw)
+        except ValueError:
+            pass
+        else:
+            raise AssertionError("corrupted measurements not detected")
+        try:
+            lat.run(5.8, L, T, 2, 6, 2, 0, store=path, **kw)
+        except ValueError:
+            pass
+        else:
+            raise AssertionError("store of another ensemble accepted")
+
+
+def check_prop_store() -> None:
+    L, T = 2, 4
+    U = random_field(L, T, seed=37)
+    S = lat.prop_from_point(U, 0.12, L, T)
+    with tempfile.TemporaryDirectory() as tmp:
+        ps = lat.PropagatorStore(tmp)
+        Sm = ps.save("a", S, kappa=0.12)
+        if not isinstance(Sm, np.memmap) or not np.array_equal(Sm, S) or ps.load("a")[1]["kappa"] != 0.12:
+            raise AssertionError("propagator store round trip")
+        # Streaming over timeslices reproduces the in-memory contractions.
+        ref = lat.hadron_corrs(S, [(1, 0, 0)])
+        for chunk in (1, 3):
+            got = lat.stream_timeslices(Sm, lambda X: lat.hadron_corrs(X, [(1, 0, 0)]), chunk)
+            for k, v in ref.items():
+                assert_close(float(np.abs(got[k] - v).max()), 0.0, 1e-12 * float(np.abs(v).max()),
+                             f"streamed {k} (chunk {chunk})")
+        _, p_neg = lat.stream_timeslices(Sm, lat.nucleon_corrs, 2)
+        assert_close(float(np.abs(p_neg - ref["p_neg"]).max()), 0.0, 1e-12, "streamed tuple contraction")
+
+        kw = dict(kappas=[0.12, 0.125], nf=0, c_flow=0.3, eps_flow=0.05, multishift=False)
+        a = lat.run(5.7, L, T, 1, 2, 2, 0, **kw)
+        b = lat.run(5.7, L, T, 1, 2, 2, 0, prop_dir=os.path.join(tmp, "run"), **kw)
+        for k in ("am_pi_0", "am_rho_1", "am_p_1"):
+            assert_close(b[k], a[k], 1e-12, f"{k} from stored propagators")
+        if lat.PropagatorStore(os.path.join(tmp, "run")).keys() != ["cfg000003_k0_h0", "cfg000003_k1_h0"]:
+            raise AssertionError("run should keep one propagator per κ and configuration")
+
+
+def check_compact_links() -> None:
+    L, T = 2, 4
+    U = random_field(L, T, seed=41)
+    R = lat.compress_links(U)
+    if R.shape != (T, L, L, L, 4, 2, 3):
+        raise AssertionError(f"compact links shape {R.shape}")
+    assert_close(float(np.abs(lat.reconstruct_links(R) - U).max()), 0.0, 1e-14, "reconstructed links")
+
+    # Dirac operator and flow accept compact links.
+    rng = np.random.default_rng(43)
+    psi = rng.normal(size=(T, L, L, L, 4, 3, 2)) + 1j * rng.normal(size=(T, L, L, L, 4, 3, 2))
+    assert_close(float(np.abs(lat.apply_hop(R, psi) - lat.apply_hop(U, psi)).max()), 0.0, 1e-13, "compact apply_hop")
+    full, compact = lat.EvenOddWilson(U), lat.EvenOddWilson(R)
+    if not compact.compact or 3 * compact.nbytes != 2 * full.nbytes:
+        raise AssertionError("compact even-odd links should take two thirds of the memory")
+    _, o = full.split(psi)
+    assert_close(float(np.abs(compact.hop(o, 0) - full.hop(o, 0)).max()), 0.0, 1e-13, "compact even-odd hop")
+    res = lat.solve_dirac(R, 0.12, psi, L, T, method="bicgstab")
+    assert_close(float(np.abs(res.x - lat.solve_dirac(U, 0.12, psi, L, T, method="bicgstab").x).max()),
+                 0.0, 1e-9, "solve with compact links")
+    E = lat.flow_trajectory(R, L, T, [0.05], eps=0.05)["E"]
+    assert_close(float(E[0]), float(lat.flow_trajectory(U, L, T, [0.05], eps=0.05)["E"][0]), 1e-12, "compact flow")
+
+    # Compact checkpoints are two thirds of the size and resume exactly.
+    kw = dict(kappas=[0.12], nf=0, c_flow=0.3, eps_flow=0.05, compact_links=True)
+    with tempfile.TemporaryDirectory() as tmp:
+        ens = lat.EnsembleStore(tmp, compact=True)
+        ens.save(0, U, rng)
+        if 3 * os.path.getsize(ens._base(0) + ".u") != 2 * U.nbytes:
+            raise AssertionError("compact checkpoint size")
+        assert_close(float(np.abs(lat.full_links(ens.load(0)[0]) - U).max()), 0.0, 1e-14, "compact checkpoint")
+        ref = lat.run(5.7, L, T, 2, 4, 2, 0, **kw)
+        path = os.path.join(tmp, "run")
+        lat.run(5.7, L, T, 2, 2, 2, 0, store=path, **kw)
+        got = lat.run(5.7, L, T, 2, 4, 2, 0, store=path, **kw)
+        for k in ("plaquette", "aLambda_msbar", "am_pi_0", "am_p_0"):
+            assert_close(got[k], ref[k], 1e-12, f"resumed compact {k}")
+
+    # Odd lattices: scalar update, multi-shift and full-lattice per-κ solves.
+    kw = dict(kw, update="scalar")
+    odd = [lat.run(5.7, 3, 4, 0, 1, 1, 0, **dict(kw, compact_links=c), multishift=m)
+           for c in (False, True) for m in (True, False)]
+    for r in odd[1:]:
+        assert_close(r["am_pi_0"], odd[0]["am_pi_0"], 1e-8, "odd-lattice pion mass")
+
+
+def check_chains() -> None:
+    L, T = 2, 4
+    kw = dict(kappas=[0.12], nf=0, c_flow=0.3, eps_flow=0.05)
+    # Spawned chains give the same merged result serially and in a process pool.
+    serial = lat.run(5.7, L, T, 2, 4, 2, 11, chains=3, workers=1, **kw)
+    pooled = lat.run(5.7, L, T, 2, 4, 2, 11, chains=3, workers=2, **kw)
+    for k in ("plaquette", "acceptance", "aLambda_msbar", "am_pi_0", "am_rho_0", "tau_int_plaquette"):
+        assert_close(pooled[k], serial[k], 1e-12, f"pooled {k}")
+    single = lat.run(5.7, L, T, 2, 4, 2, 11, **kw)
+    if serial["n_meas"] != 3 * single["n_meas"] or serial["plaquette"] == single["plaquette"]:
+        raise AssertionError("chains should be independent and pooled into one ensemble")
+
+
+def check_errors() -> None:
+    rng = np.random.default_rng(3)
+    x = np.empty(20000)
+    x[0] = 0.0
+    eta = rng.normal(size=x.size)
+    for i in range(1, x.size):
+        x[i] = 0.8 * x[i - 1] + eta[i]
+    # AR(1) process: τ_int = (1+φ)/(2(1-φ)) = 4.5 for φ=0.8
+    mean, err, tau, dtau = lat.gamma_method(x)
+    assert_close(tau, 4.5, 3 * dtau, "Gamma-method tau_int of AR(1)")
+    assert_close(err, np.sqrt(2 * tau * x.var() / x.size), 1e-12, "Gamma-method error")
+    if lat.gamma_method(x[:6])[2] < 0.5:
+        raise AssertionError("tau_int of a short series below 1/2")
+
+    # Jackknife of a mean is the standard error; bootstrap agrees roughly.
+    y = {"y": rng.normal(size=(50, 2))}
+    f = lambda m: {"a": float(m["y"][0]), "b": float(m["y"][0] * m["y"][1])}
+    est, err = lat.resample_errors(y, f)
+    assert_close(err["a"], y["y"][:, 0].std(ddof=1) / np.sqrt(50), 1e-12, "jackknife error of a mean")
+    _, berr = lat.resample_errors(y, f, method="bootstrap", n_boot=400, rng=np.random.default_rng(0))
+    assert_close(berr["a"], err["a"], 0.2 * err["a"], "bootstrap vs jackknife")
+    if lat.bin_series(np.arange(7.0), 3).tolist() != [1.0, 4.0]:
+        raise AssertionError("bin_series")
+
+    # Every output gets an error; a loose target stops the run before its sweep budget.
+    kw = dict(kappas=[0.12], nf=0, c_flow=0.3, eps_flow=0.05)
+    out = lat.run(5.7, 2, 4, 2, 20, 1, 0, target_err=1.0, target_key="g2_GF", bin_size=1, **kw)
+    if out["sweeps_done"] >= 20 or out["n_meas"] != 4:
+        raise AssertionError(f"adaptive stop after {out['sweeps_done']} sweeps")
+    for k in ("aLambda_msbar", "am_pi_0", "plaquette", "t0"):
+        if f"{k}_err" not in out:
+            raise AssertionError(f"missing {k}_err")
+    try:
+        lat.run(5.7, 2, 4, 0, 8, 1, 0, target_err=0.1, target_key="nope", **kw)
+    except ValueError:
+        pass
+    else:
+        raise AssertionError("unknown target observable accepted")
+
+
+def main() -> None:
+    check_plaquette()
+    check_su3_project()
+    check_checkerboard()
+    check_heatbath()
+    check_flow()
+    check_clover()
+    check_solvers()
+    check_contractions()
+    check_smearing()
+    check_sources()
+    check_store()
+    check_prop_store()
+    check_compact_links()
+    check_chains()
+    check_errors()
+    print("OK: oph_lattice_su3_quenched_v5 smoke tests passed")
+
+
+if __name__ == '__main__':
+    main()
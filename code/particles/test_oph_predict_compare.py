@@ -5,6 +5,7 @@ These tests validate:
 - predictions do not depend on PDG_REF (no-cheat)
 - neutrino masses depend on log_dim_H (capacity constant)
 - hadron path executes and returns finite C constants on tiny demo settings
+- β points run concurrently and the O(a^2) fit handles more than two spacings
 
 Run:
   python3 test_oph_predict_compare.py
@@ -54,7 +55,7 @@ def main() -> None:
         loops=2,
         hadron_profile='demo',
         hadron_overrides={
-            'L': 2, 'T': 4, 'therm': 0, 'sweeps': 1, 'every': 1,
+            'L': 2, 'T': 4, 'therm': 0, 'sweeps': 3, 'every': 1,
             'kappas': [0.120],
             'beta1': 5.7, 'beta2': 6.0,
             'eps': 0.05,
@@ -66,12 +67,45 @@ def main() -> None:
         if k not in C:
             raise AssertionError(f"missing {k} in np_constants")
         assert_finite(float(C[k]), k)
+        assert_finite(float(C[f"{k}_err"]), f"{k}_err")
 
     # Masses (GeV) should be finite (though not physical at this tiny lattice).
     for k in ['m_p','m_n','m_pi','m_rho']:
         if predH[k] is not None:
             assert_finite(float(predH[k]), k)
 
+    # Least-squares O(a^2) fit: exact for two spacings, recovers a line in a^2.
+    c0, _, _ = pc.continuum_fit([1.2, 1.5], [0.3, 0.2])
+    if abs(c0 - pc.richardson_c0(1.2, 0.3, 1.5, 0.2)) > 1e-12:
+        raise AssertionError("two-point continuum fit should match richardson_c0")
+    c0, slope, _ = pc.continuum_fit([2.0 + 3.0 * a * a for a in (0.1, 0.2, 0.3)] + [float("nan")], [0.1, 0.2, 0.3, 0.4])
+    if abs(c0 - 2.0) > 1e-12 or abs(slope - 3.0) > 1e-12:
+        raise AssertionError(f"continuum fit gave C0={c0}, b={slope}")
+    # Weighted fit: two points propagate their errors as in richardson_c0; a
+    # precise point pulls the fit towards itself.
+    _, _, dc0 = pc.continuum_fit([1.2, 1.5], [0.3, 0.2], [0.1, 0.2])
+    if abs(dc0 - math.hypot(0.09 * 0.2, 0.04 * 0.1) / 0.05) > 1e-12:
+        raise AssertionError(f"continuum fit error {dc0}")
+    c0, _, _ = pc.continuum_fit([2.0, 2.1, 1.0], [0.1, 0.2, 0.3], [0.01, 0.01, 1.0])
+    if abs(c0 - 2.0 + 0.1 / 3.0) > 0.01:
+        raise AssertionError(f"weighted continuum fit gave C0={c0}")
+
+    # Three β points on a pool give the same result as in-process, with progress.
+    over = {'L': 2, 'T': 4, 'therm': 0, 'sweeps': 1, 'every': 1, 'kappas': [0.120],
+            'betas': [5.7, 5.85, 6.0], 'eps': 0.05}
+    msgs: list = []
+    pooled = pc.compute_np_constants_internal('demo', {**over, 'workers': 2}, progress=msgs.append)
+    serial = pc.compute_np_constants_internal('demo', {**over, 'workers': 1}, progress=None)
+    if len(msgs) != 3 or len(pooled["meta"]["points"]) != 3:
+        raise AssertionError(f"expected three β points with progress, got {msgs}")
+    if any(f"{k}_err" not in pt for pt in pooled["meta"]["points"] for k in ("C_p", "C_pi", "C_rho")):
+        raise AssertionError("β points lack per-point errors")
+    for k, v in serial["C"].items():
+        if not k.endswith("_err"):
+            assert_finite(v, k)
+        if v != pooled["C"][k] and not (math.isnan(v) and math.isnan(pooled["C"][k])):
+            raise AssertionError(f"pooled {k} differs from the in-process run")
+
     print("OK: oph_predict_compare smoke tests passed")
 
 